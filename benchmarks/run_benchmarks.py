@@ -0,0 +1,182 @@
+"""
+Benchmarks for spectres, sweeping the input and output grid sizes
+(upsampling and downsampling), the number of spectra, with and without
+uncertainties, float64 and float32, and every available backend.
+
+Run from the top level of the repository with:
+
+    python benchmarks/run_benchmarks.py --output results.json
+
+and compare against an earlier run, failing if any case has slowed down
+by more than the threshold factor, with:
+
+    python benchmarks/run_benchmarks.py --compare results.json --threshold 1.25
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from timeit import Timer
+
+import numpy as np
+
+# Benchmark the copy of spectres in this repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import spectres
+
+
+# Cases with more than this many input or output values are skipped
+max_values = 2*10**7
+
+
+def make_case(n_old, n_new, n_spectra, errs, dtype):
+    """ Make the inputs for one benchmark case outside the timed call. """
+    rng = np.random.default_rng(0)
+
+    spec_wavs = np.linspace(1000., 10000., n_old)
+    new_wavs = np.linspace(1100., 9900., n_new)
+
+    shape = (n_spectra, n_old) if n_spectra > 1 else (n_old,)
+    spec_fluxes = rng.random(shape).astype(dtype)
+    spec_errs = 0.1*spec_fluxes if errs else None
+
+    return new_wavs, spec_wavs, spec_fluxes, spec_errs
+
+
+def cases(sizes, ratios, n_spectra, backends):
+    """ Yield the parameters of every benchmark case. """
+    for (n_old, ratio, n_spec, errs, dtype, backend) in itertools.product(
+            sizes, ratios, n_spectra, (False, True), ("float64", "float32"),
+            backends):
+
+        n_new = max(int(n_old*ratio), 2)
+
+        if n_spec*max(n_old, n_new) > max_values:
+            continue
+
+        name = "n_old=%d-n_new=%d-n_spectra=%d-errs=%s-%s-%s" % (
+            n_old, n_new, n_spec, errs, dtype, backend)
+
+        yield dict(name=name, n_old=n_old, n_new=n_new, n_spectra=n_spec,
+                   errs=errs, dtype=dtype, backend=backend)
+
+
+def time_case(case, repeat):
+    """ Return the fastest time per call for a benchmark case. """
+    new_wavs, spec_wavs, spec_fluxes, spec_errs = make_case(
+        case["n_old"], case["n_new"], case["n_spectra"], case["errs"],
+        case["dtype"])
+
+    def call():
+        spectres.spectres(new_wavs, spec_wavs, spec_fluxes, spec_errs,
+                          verbose=False, backend=case["backend"],
+                          preserve_dtype=True)
+
+    # The first call compiles the Numba kernels for these inputs
+    call()
+
+    timer = Timer(call)
+    number, total = timer.autorange()
+    times = [total] + timer.repeat(repeat=repeat-1, number=number)
+
+    return min(times)/number
+
+
+def metadata():
+    return {"python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "backends": spectres.available_backends(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare(results, baseline, threshold):
+    """ Print the change in time of every case also in baseline and
+    return the names of those which slowed down by more than threshold. """
+    previous = dict((result["name"], result["time"])
+                    for result in baseline["results"])
+    regressions = []
+
+    for result in results:
+        if result["name"] not in previous:
+            continue
+
+        ratio = result["time"]/previous[result["name"]]
+        flag = ""
+
+        if ratio > threshold:
+            regressions.append(result["name"])
+            flag = "  REGRESSION"
+
+        print("%-70s %6.2fx%s" % (result["name"], ratio, flag))
+
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark spectres.")
+    parser.add_argument("--output", help="Path of JSON file to write.")
+    parser.add_argument("--compare", help="Path of JSON file from an "
+                        "earlier run to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown factor counted as a regression.")
+    parser.add_argument("--filter", default="",
+                        help="Only run cases whose names contain this.")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Number of timing repeats for each case.")
+    parser.add_argument("--quick", action="store_true",
+                        help="Run a reduced set of cases.")
+    args = parser.parse_args(args)
+
+    if args.quick:
+        sizes, ratios, n_spectra = [1000, 10000], [0.1, 4.], [1, 100]
+
+    else:
+        sizes = [1000, 10000, 100000]
+        ratios = [0.01, 0.1, 0.5, 2., 4.]
+        n_spectra = [1, 100, 1000]
+
+    results = []
+
+    for case in cases(sizes, ratios, n_spectra,
+                      spectres.available_backends()):
+
+        if args.filter not in case["name"]:
+            continue
+
+        case["time"] = time_case(case, args.repeat)
+        case["pixels_per_second"] = (case["n_spectra"]*case["n_old"]
+                                     / case["time"])
+        results.append(case)
+
+        print("%-70s %10.3e s" % (case["name"], case["time"]))
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"metadata": metadata(), "results": results}, output,
+                      indent=1)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline),
+                                  args.threshold)
+
+        if regressions:
+            print("%d cases slowed down by more than %.2fx."
+                  % (len(regressions), args.threshold))
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,7 +8,7 @@ import time
 # Load up the wavelength values the models are sampled at
 model_wavs = np.genfromtxt("bc2003_hr_xmiless_m62_kroup_ssp.ised_ASCII", skip_header=6, skip_footer=233, usecols=np.arange(1, 13216, dtype="int"))
 
-# Load up the model grid, the first axis must run over wavelength, the second may contain different spectra to be resampled
+# Load up the model grid, the last axis runs over wavelength, the first contains the different spectra to be resampled (grids stored wavelength first can be resampled with axis=0)
 model_grid = np.genfromtxt("bc2003_hr_xmiless_m62_kroup_ssp.ised_ASCII", skip_header=7, skip_footer=12, usecols=np.arange(1, 13216, dtype="int"))
 
 # Specify the wavelength sampling to be applied to the spectrum or spectra
@@ -25,7 +25,9 @@ setup(
 
     packages=["spectres"],
 
-    install_requires=['numpy'],  # Optional
+    python_requires='>=3.9',
+
+    install_requires=['numpy>=1.20'],  # Optional
 
     project_urls={  # Optional
         "GitHub": "https://github.com/ACCarnall/spectres",
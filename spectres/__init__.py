@@ -1,4 +1,33 @@
-try:
-    from .spectral_resampling_numba import spectres
-except ImportError:
-    from .spectral_resampling import spectres
+from .spectral_resampling import spectres
+from .resampling_plan import ResamplingPlan, spectres_adjoint
+from .redshift_grid import spectres_redshift_grid
+from .multi_grid import spectres_multi
+from .photometry import FilterSet
+from .adaptive import spectres_adaptive
+from .coadd import spectres_coadd
+from .chunked import spectres_chunked
+from .streaming import spectres_stream, stream_windows
+from .parallel import ParallelResampler
+from .workspace import Workspace
+from .backends import available_backends
+from .cache import set_cache, clear_cache, cache_info
+from .profiling import profile
+
+
+def __getattr__(name):
+    # Imported here so that python -m spectres.compile does not find
+    # spectres.compile already imported
+    if name == "warmup":
+        from .compile import warmup
+        return warmup
+
+    # Only import Numba when spectres_numba is first used
+    if name == "spectres_numba":
+        try:
+            from .spectral_resampling_numba import spectres_numba
+            return spectres_numba
+
+        except ImportError:
+            pass
+
+    raise AttributeError("module 'spectres' has no attribute '%s'" % name)
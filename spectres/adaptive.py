@@ -0,0 +1,169 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from .spectral_resampling import make_bins
+
+
+# Number of candidate bin ends first tested at once
+_min_block = 16
+
+
+def spectres_adaptive(spec_wavs, spec_fluxes, spec_errs, target_snr,
+                      min_width=0., reduce=np.min, return_edges=False):
+    """
+    Function for rebinning spectra onto the coarsest wavelength grid
+    whose bins reach a target signal-to-noise ratio. Starting from the
+    blue end, each new bin is grown one old bin at a time until it is
+    at least min_width wide and its signal-to-noise ratio reaches
+    target_snr, using prefix sums of the fluxes and variances so that
+    the whole grid is found in a single pass. New bin edges are always
+    old bin edges, and the new fluxes and uncertainties are the same
+    width-weighted means calculated by spectres.
+
+    Parameters
+    ----------
+
+    spec_wavs : numpy.ndarray
+        1D array containing the current wavelength sampling of the
+        spectrum or spectra.
+
+    spec_fluxes : numpy.ndarray
+        Array containing spectral fluxes at the wavelengths specified in
+        spec_wavs, last dimension must correspond to the shape of
+        spec_wavs. Extra dimensions before this may be used to include
+        multiple spectra, which are all rebinned onto one shared grid.
+
+    spec_errs : numpy.ndarray
+        Array of the same shape as spec_fluxes containing uncertainties
+        associated with each spectral flux value.
+
+    target_snr : float
+        Signal-to-noise ratio each new bin must reach.
+
+    min_width : float (optional)
+        Minimum width of each new bin, in the same units as spec_wavs.
+
+    reduce : callable (optional)
+        Function used to combine the signal-to-noise ratios of several
+        spectra into one for each trial bin, called with the ratios and
+        axis=0, e.g. numpy.median. By default every spectrum must reach
+        target_snr.
+
+    return_edges : bool (optional)
+        If True also return the edges of the new bins.
+
+    Returns
+    -------
+
+    new_wavs : numpy.ndarray
+        1D array of the centres of the new bins. Old bins left over at
+        the red end which do not reach target_snr are merged into the
+        last new bin.
+
+    new_fluxes : numpy.ndarray
+        Array of rebinned flux values, last dimension is the same length
+        as new_wavs, other dimensions are the same as spec_fluxes.
+
+    new_errs : numpy.ndarray
+        Array of uncertainties associated with fluxes in new_fluxes.
+
+    new_edges : numpy.ndarray
+        1D array of the edges of the new bins, one longer than new_wavs.
+        Only returned if return_edges is True.
+    """
+
+    spec_wavs = np.asarray(spec_wavs)
+    spec_fluxes = np.asarray(spec_fluxes)
+    spec_errs = np.asarray(spec_errs)
+
+    if spec_errs.shape != spec_fluxes.shape:
+        raise ValueError("spec_errs must be the same shape as spec_fluxes.")
+
+    if spec_wavs.ndim != 1 or spec_fluxes.shape[-1] != spec_wavs.shape[0]:
+        raise ValueError("spec_wavs must be 1D and the same length as the "
+                         "last dimension of spec_fluxes.")
+
+    if target_snr <= 0.:
+        raise ValueError("target_snr must be positive.")
+
+    old_edges, old_widths = make_bins(spec_wavs)
+    n_old = old_widths.shape[0]
+
+    # Prefix sums of the width-weighted fluxes and variances, as used by
+    # the NumPy engine of spectres
+    flat_shape = (spec_fluxes.size//n_old, n_old + 1)
+    cum_fluxes = np.zeros(flat_shape)
+    cum_vars = np.zeros(flat_shape)
+    np.cumsum((old_widths*spec_fluxes).reshape(-1, n_old), axis=-1,
+              out=cum_fluxes[:, 1:])
+    np.cumsum(((old_widths*spec_errs)**2).reshape(-1, n_old), axis=-1,
+              out=cum_vars[:, 1:])
+
+    # Indices of the old edges at which each new bin ends
+    bounds = [0]
+    block = _min_block
+
+    while True:
+        first = bounds[-1]
+
+        # Candidate ends are tested in blocks, which start at twice the
+        # length of the last bin so each old bin is tested about twice
+        end = max(np.searchsorted(old_edges, old_edges[first] + min_width),
+                  first + 1)
+        found = None
+
+        while end <= n_old and found is None:
+            ends = np.arange(end, min(end + block, n_old + 1))
+            signal = cum_fluxes[:, ends] - cum_fluxes[:, first:first+1]
+            noise = np.maximum(cum_vars[:, ends]
+                               - cum_vars[:, first:first+1], 0.)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                snr = reduce(signal/np.sqrt(noise), axis=0)
+
+            reached = np.flatnonzero(snr >= target_snr)
+
+            if reached.shape[0]:
+                found = ends[reached[0]]
+
+            end = ends[-1] + 1
+            block *= 2
+
+        if found is None:
+            break
+
+        bounds.append(found)
+        block = max(2*(found - first), _min_block)
+
+    # Merge what is left at the red end into the last bin
+    if bounds[-1] < n_old:
+        if len(bounds) > 1:
+            bounds[-1] = n_old
+
+        else:
+            bounds.append(n_old)
+
+    bounds = np.array(bounds)
+    new_edges = old_edges[bounds]
+    new_widths = np.diff(new_edges)
+    new_shape = spec_fluxes.shape[:-1] + new_widths.shape
+
+    new_fluxes = np.diff(cum_fluxes[:, bounds], axis=-1)/new_widths
+    new_errs = np.sqrt(np.maximum(np.diff(cum_vars[:, bounds], axis=-1),
+                                  0.))/new_widths
+
+    # Single old bins are copied, exactly as in spectres
+    single = np.diff(bounds) == 1
+    flat_fluxes = spec_fluxes.reshape(-1, n_old)
+    flat_errs = spec_errs.reshape(-1, n_old)
+    new_fluxes[:, single] = flat_fluxes[:, bounds[:-1][single]]
+    new_errs[:, single] = flat_errs[:, bounds[:-1][single]]
+
+    results = ((new_edges[1:] + new_edges[:-1])/2,
+               new_fluxes.reshape(new_shape), new_errs.reshape(new_shape))
+
+    if return_edges:
+        results += (new_edges,)
+
+    return results
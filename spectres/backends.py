@@ -0,0 +1,104 @@
+from __future__ import print_function, division, absolute_import
+
+import importlib
+import importlib.util
+from collections import OrderedDict
+
+
+# Resampling engines keyed by backend name, in order of preference for
+# backend="auto". Each engine takes (old_edges, old_widths, new_edges,
+# old_fluxes, old_errs, fill, overlaps, dtype, out, out_errs) and
+# returns (new_fluxes, new_errs, inside), where overlaps is the output
+# of find_overlaps or None if it has not been calculated yet, dtype is
+# the data type of the outputs and out and out_errs are optional arrays
+# to write the outputs into. Engines which release the GIL also take
+# _serial, which ParallelResampler sets to True so that they do not
+# start parallel threads of their own (the Numba engine also runs
+# serially whenever it is called outside the main thread). The engine
+# is None for backends which have not been loaded yet.
+_backends = OrderedDict()
+
+# Modules defining the engines of backends which are loaded lazily
+_modules = {}
+
+# Names of backends whose engines release the GIL while they run
+_nogil_backends = set()
+
+
+def register_backend(name, engine, priority=False, nogil=False):
+    """ Make a resampling engine available to spectres under name. If
+    priority is True it will be preferred when backend="auto", nogil
+    should be True if the engine releases the GIL so that it can be run
+    in several threads at once. """
+    # Loading a lazy backend keeps its place in the order
+    if priority and name not in _backends:
+        _backends[name] = engine
+        _backends.move_to_end(name, last=False)
+
+    _backends[name] = engine
+
+    if nogil:
+        _nogil_backends.add(name)
+
+
+def register_lazy_backend(name, module, requires, priority=False,
+                          nogil=False):
+    """ Make a backend available whose engine is registered by module,
+    which is only imported when the backend is first used, so that
+    importing spectres does not import e.g. Numba. The backend is only
+    made available if the module requires can be found. """
+    try:
+        if importlib.util.find_spec(requires) is None:
+            return
+
+    except ImportError:
+        return
+
+    _modules[name] = module
+    register_backend(name, None, priority=priority, nogil=nogil)
+
+
+def available_backends():
+    """ Return the names of the backends which can be passed to
+    spectres, the first of which is used when backend="auto". """
+    return list(_backends)
+
+
+def resolve_backend(name):
+    """ Return the name of the backend used for a backend name, which
+    may be "auto". """
+    if name == "auto":
+        return next(iter(_backends))
+
+    if name not in _backends:
+        raise ValueError("Unknown backend '%s', available backends are: %s."
+                         % (name, ", ".join(_backends)))
+
+    return name
+
+
+def get_backend(name):
+    """ Return the resampling engine for a backend name, importing its
+    module if it has not been used before. """
+    resolved = resolve_backend(name)
+
+    if _backends[resolved] is None:
+        try:
+            importlib.import_module(_modules[resolved])
+
+        # Drop backends which cannot be loaded, and fall back to the
+        # next one if it was picked automatically
+        except ImportError:
+            del _backends[resolved]
+
+            if name == "auto":
+                return get_backend(name)
+
+            raise
+
+    return _backends[resolved]
+
+
+def releases_gil(name):
+    """ Return True if the engine for a backend name releases the GIL. """
+    return resolve_backend(name) in _nogil_backends
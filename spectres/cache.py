@@ -0,0 +1,145 @@
+from __future__ import print_function, division, absolute_import
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Number of evenly spaced values sampled from each grid for its key
+_n_samples = 32
+
+
+class GridCache(object):
+    """ Least recently used cache of the bin edges, widths and overlaps
+    calculated by spectres for pairs of wavelength grids. Entries are
+    evicted once there are more than maxsize of them or they take up
+    more than maxbytes between them. """
+
+    def __init__(self, maxsize=0, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def fingerprint(wavs):
+        """ Cheap key for a grid made from its shape, dtype, sum, sum of
+        squares and a sample of its values. """
+        flat = wavs.ravel()
+        step = max(flat.shape[0]//_n_samples, 1)
+
+        return (wavs.shape, wavs.dtype.str, float(flat.sum()),
+                float(np.dot(flat, flat)), flat[::step].tobytes(),
+                flat[-1].tobytes())
+
+    def _evict(self):
+        while self._entries and (
+                len(self._entries) > self.maxsize
+                or (self.maxbytes is not None
+                    and self.nbytes > self.maxbytes)):
+
+            key, (value, nbytes) = self._entries.popitem(last=False)
+            self.nbytes -= nbytes
+            self.evictions += 1
+
+    def get(self, new_wavs, old_wavs, compute):
+        """ Return the cached value for a pair of grids, calling
+        compute(new_wavs, old_wavs) to make it if it is not cached. The
+        value must be a tuple of arrays, which are made read-only. """
+
+        if self.maxsize <= 0:
+            return compute(new_wavs, old_wavs)
+
+        key = (self.fingerprint(new_wavs), self.fingerprint(old_wavs))
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            self.misses += 1
+
+        value = compute(new_wavs, old_wavs)
+        nbytes = 0
+
+        for array in _arrays(value):
+            array.flags.writeable = False
+            nbytes += array.nbytes
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, nbytes)
+                self.nbytes += nbytes
+
+            self._evict()
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions,
+                "currsize": len(self._entries), "maxsize": self.maxsize,
+                "nbytes": self.nbytes, "maxbytes": self.maxbytes}
+
+
+def _arrays(value):
+    """ Yield the arrays in a possibly nested tuple. """
+    for item in value:
+        if isinstance(item, tuple):
+            for array in _arrays(item):
+                yield array
+        else:
+            yield item
+
+
+# Process-wide cache used by spectres, disabled until set_cache is called
+grid_cache = GridCache()
+
+
+def set_cache(maxsize=128, maxbytes=None):
+    """
+    Enable (or resize) the process-wide cache of the bin edges, widths
+    and overlaps calculated by spectres. Calls with the same new_wavs
+    and spec_wavs as a cached call reuse these rather than calculating
+    them again. Grids are identified by a fingerprint made from their
+    shape, dtype, sum, sum of squares and a sample of their values.
+
+    Parameters
+    ----------
+
+    maxsize : int (optional)
+        Maximum number of pairs of grids to cache, 0 disables the cache.
+
+    maxbytes : int (optional)
+        Maximum total size of the cached arrays in bytes.
+    """
+
+    with grid_cache._lock:
+        grid_cache.maxsize = maxsize
+        grid_cache.maxbytes = maxbytes
+        grid_cache._evict()
+
+
+def clear_cache():
+    """ Remove all entries from the cache and reset its statistics. """
+    grid_cache.clear()
+    grid_cache.hits = grid_cache.misses = grid_cache.evictions = 0
+
+
+def cache_info():
+    """ Return a dictionary of the number of cache hits, misses and
+    evictions and the current and maximum size of the cache. """
+    return grid_cache.info()
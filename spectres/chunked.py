@@ -0,0 +1,169 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from .backends import get_backend
+from .spectral_resampling import (make_bins, find_overlaps, _warn_fill,
+                                  _output_dtype)
+
+
+def _open_input(array):
+    """ Open a .npy file path as a read-only memory map. """
+    if isinstance(array, str):
+        return np.load(array, mmap_mode="r")
+
+    return array
+
+
+def _open_output(out, shape, dtype):
+    """ Create a .npy memory map at a path, or check an existing output
+    array has the right shape. """
+    if out is None:
+        return np.zeros(shape, dtype=dtype)
+
+    if isinstance(out, str):
+        return np.lib.format.open_memmap(out, mode="w+", dtype=dtype,
+                                         shape=shape)
+
+    if out.shape != shape:
+        raise ValueError("Output array has shape %s, expected %s."
+                         % (out.shape, shape))
+
+    return out
+
+
+def spectres_chunked(new_wavs, spec_wavs, spec_fluxes, spec_errs=None,
+                     out=None, out_errs=None, chunk_rows=1024, fill=None,
+                     verbose=True, backend="auto", dtype=None,
+                     preserve_dtype=False):
+    """
+    Function for resampling libraries of spectra which are too large to
+    hold in memory. The spectra are read and resampled in blocks of
+    chunk_rows along the first axis of spec_fluxes, and each block is
+    written straight into the output, so the peak memory use is set by
+    chunk_rows rather than the size of the library.
+
+    Parameters
+    ----------
+
+    new_wavs : numpy.ndarray
+        1D array containing the new wavelength sampling desired for the
+        spectra.
+
+    spec_wavs : numpy.ndarray
+        1D array containing the current wavelength sampling of the
+        spectra.
+
+    spec_fluxes : numpy.ndarray or str
+        Array (usually a numpy.memmap) or path to a .npy file containing
+        spectral fluxes at the wavelengths specified in spec_wavs. The
+        last dimension must correspond to the shape of spec_wavs, and
+        the first dimension is split into blocks. A 1D spectrum is
+        resampled in a single block.
+
+    spec_errs : numpy.ndarray or str (optional)
+        Array or path to a .npy file of the same shape as spec_fluxes
+        containing uncertainties associated with each spectral flux
+        value.
+
+    out : numpy.ndarray or str (optional)
+        Array (e.g. a numpy.memmap) or path of a .npy file to create,
+        into which the new fluxes are written. If not specified the new
+        fluxes are returned in a new in-memory array.
+
+    out_errs : numpy.ndarray or str (optional)
+        As out, for the new uncertainties. Only used if spec_errs was
+        specified.
+
+    chunk_rows : int (optional)
+        Number of entries along the first axis of spec_fluxes to
+        resample at a time.
+
+    fill : float (optional)
+        Where new_wavs extends outside the wavelength range in spec_wavs
+        this value will be used as a filler in new_fluxes and new_errs.
+
+    verbose : bool (optional)
+        Setting verbose to False will suppress the default warning about
+        new_wavs extending outside spec_wavs and "fill" being used.
+
+    backend : str (optional)
+        Name of the resampling engine to use, see available_backends.
+
+    dtype : numpy.dtype (optional)
+        Data type of new output arrays, float64 by default.
+
+    preserve_dtype : bool (optional)
+        If True (and dtype is not set) new output arrays have the same
+        data type as spec_fluxes.
+
+    Returns
+    -------
+
+    new_fluxes : numpy.ndarray
+        The array new fluxes were written into, last dimension is the
+        same length as new_wavs, other dimensions are the same as
+        spec_fluxes.
+
+    new_errs : numpy.ndarray
+        The array new uncertainties were written into. Only returned if
+        spec_errs was specified.
+    """
+
+    spec_fluxes = _open_input(spec_fluxes)
+    spec_errs = _open_input(spec_errs)
+
+    if spec_errs is not None and spec_errs.shape != spec_fluxes.shape:
+        raise ValueError("If specified, spec_errs must be the same shape "
+                         "as spec_fluxes.")
+
+    # The bins and overlaps are shared by every block of spectra
+    old_edges, old_widths = make_bins(spec_wavs)
+    new_edges, new_widths = make_bins(new_wavs)
+    overlaps = find_overlaps(old_edges, old_widths, new_edges)
+
+    if verbose and not np.all(overlaps[4][[0, -1]]):
+        _warn_fill()
+
+    new_shape = spec_fluxes.shape[:-1] + new_wavs.shape
+    dtype = _output_dtype(spec_fluxes, dtype, preserve_dtype)
+    new_fluxes = _open_output(out, new_shape, dtype)
+    new_errs = None
+
+    if spec_errs is not None:
+        new_errs = _open_output(out_errs, new_shape, dtype)
+
+    resample = get_backend(backend)
+
+    # A single spectrum is resampled through views with one row
+    arrays = (spec_fluxes, spec_errs, new_fluxes, new_errs)
+
+    if spec_fluxes.ndim == 1:
+        arrays = tuple(None if array is None else array[np.newaxis]
+                       for array in arrays)
+
+    row_fluxes, row_errs, new_rows, new_err_rows = arrays
+
+    for first in range(0, row_fluxes.shape[0], chunk_rows):
+        block = slice(first, first + chunk_rows)
+        block_errs = None if row_errs is None else row_errs[block]
+
+        block_fluxes, block_errs, inside = resample(
+            old_edges, old_widths, new_edges, row_fluxes[block],
+            block_errs, fill=fill, overlaps=overlaps,
+            dtype=new_fluxes.dtype)
+
+        new_rows[block] = block_fluxes
+
+        if spec_errs is not None:
+            new_err_rows[block] = block_errs
+
+    for array in (new_fluxes, new_errs):
+        if isinstance(array, np.memmap):
+            array.flush()
+
+    if spec_errs is not None:
+        return new_fluxes, new_errs
+
+    else:
+        return new_fluxes
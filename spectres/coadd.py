@@ -0,0 +1,112 @@
+from __future__ import print_function, division, absolute_import
+
+import warnings
+
+import numpy as np
+
+from .spectral_resampling import spectres
+
+
+def spectres_coadd(new_wavs, exposures, fill=None, verbose=True,
+                   backend="auto", ignore_nan=False):
+    """
+    Function for co-adding many exposures, each with its own wavelength
+    sampling, onto a new wavelength basis. Each exposure is resampled
+    with spectres and added into running sums of the inverse-variance
+    weighted fluxes, the inverse variances and the number of exposures
+    covering each new bin, so exposures may come from a generator and
+    only arrays the size of the output are held in memory however many
+    exposures are stacked.
+
+    Parameters
+    ----------
+
+    new_wavs : numpy.ndarray
+        1D array containing the new wavelength sampling desired for the
+        co-added spectrum or spectra.
+
+    exposures : iterable
+        Iterable of (spec_wavs, spec_fluxes, spec_errs) tuples, one for
+        each exposure, as would be passed to spectres. The fluxes of
+        every exposure must have the same shape apart from their last
+        dimension.
+
+    fill : float (optional)
+        Value used in new_fluxes and new_errs for new bins which are not
+        covered by any exposure.
+
+    verbose : bool (optional)
+        Setting verbose to False will suppress the default warning about
+        new bins not covered by any exposure and "fill" being used.
+
+    backend : str (optional)
+        Name of the resampling engine to use, see available_backends.
+
+    ignore_nan : bool (optional)
+        If True, pixels where the fluxes (or uncertainties) of an
+        exposure are NaN are ignored, as in spectres.
+
+    Returns
+    -------
+
+    new_fluxes : numpy.ndarray
+        Array of inverse-variance weighted mean fluxes, last dimension
+        is the same length as new_wavs, other dimensions are the same
+        as the fluxes of each exposure.
+
+    new_errs : numpy.ndarray
+        Array of uncertainties associated with fluxes in new_fluxes.
+
+    coverage : numpy.ndarray
+        Number of exposures contributing to each new bin. New bins
+        outside the wavelength range of an exposure, or where its
+        resampled flux or uncertainty is not finite or its uncertainty
+        is zero, do not count.
+    """
+
+    sum_fluxes = sum_weights = coverage = None
+    new_fluxes = new_errs = None
+
+    for spec_wavs, spec_fluxes, spec_errs in exposures:
+
+        # The resampled arrays from the first exposure are reused for
+        # every later one
+        new_fluxes, new_errs = spectres(
+            new_wavs, spec_wavs, spec_fluxes, spec_errs, fill=np.nan,
+            verbose=False, backend=backend, ignore_nan=ignore_nan,
+            out=new_fluxes, out_errs=new_errs)
+
+        if sum_fluxes is None:
+            sum_fluxes = np.zeros(new_fluxes.shape)
+            sum_weights = np.zeros(new_fluxes.shape)
+            coverage = np.zeros(new_fluxes.shape, dtype=int)
+
+        with np.errstate(divide="ignore"):
+            weights = 1./new_errs**2
+
+        good = np.isfinite(weights) & np.isfinite(new_fluxes)
+        weights[~good] = 0.
+
+        sum_fluxes += np.where(good, weights*new_fluxes, 0.)
+        sum_weights += weights
+        coverage += good
+
+    if sum_fluxes is None:
+        raise ValueError("At least one exposure must be given.")
+
+    covered = coverage > 0
+    fill = np.nan if fill is None else fill
+
+    if verbose and not np.all(covered):
+        warnings.warn(
+            "Spectres: some new bins are not covered by any exposure, "
+            "new_fluxes and new_errs will be set to the value of the "
+            "'fill' keyword argument (by default nan).",
+            category=RuntimeWarning,
+        )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        new_fluxes[...] = np.where(covered, sum_fluxes/sum_weights, fill)
+        new_errs[...] = np.where(covered, 1./np.sqrt(sum_weights), fill)
+
+    return new_fluxes, new_errs, coverage
@@ -0,0 +1,142 @@
+"""
+Compile the Numba kernels used by spectres ahead of time. Running
+
+    python -m spectres.compile
+
+calls every backend once with each common combination of inputs, which
+fills Numba's on-disk cache so later processes load the compiled
+kernels rather than compiling them. Adding --aot also builds the
+_spectres_aot extension module (using numba.pycc and a C compiler),
+which is used by backend="aot" and does not need Numba to be imported
+at all.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import argparse
+import importlib
+import itertools
+import os
+import time
+
+import numpy as np
+
+from .backends import (available_backends, get_backend, releases_gil,
+                       register_lazy_backend)
+
+
+def warmup(dtypes=("float64", "float32"), with_errs=(False, True),
+           backends=None):
+    """
+    Load the compiled backends and compile their kernels now, rather
+    than during the first call to spectres which uses them. Kernels
+    are compiled for spectra of each data type in dtypes, with float64
+    outputs and with outputs of the same data type.
+
+    Parameters
+    ----------
+
+    dtypes : list (optional)
+        Data types of the spectra which will be resampled.
+
+    with_errs : list (optional)
+        Whether the spectra will be resampled without uncertainties
+        (False), with them (True) or both.
+
+    backends : list (optional)
+        Names of the backends to warm up, all of those available by
+        default.
+
+    Returns
+    -------
+
+    times : dict
+        Time in seconds taken to warm up each backend.
+    """
+
+    from .spectral_resampling import spectres, make_bins
+    from .workspace import Workspace
+
+    spec_wavs = np.linspace(1., 9., 32)
+    new_wavs = np.linspace(1.5, 8.5, 8)
+    old_edges, old_widths = make_bins(spec_wavs)
+    new_edges = make_bins(new_wavs)[0]
+    times = {}
+
+    for name in available_backends() if backends is None else backends:
+        start_time = time.perf_counter()
+        resample = get_backend(name)
+
+        for dtype, errs, preserve in itertools.product(dtypes, with_errs,
+                                                       (False, True)):
+
+            fluxes = np.ones((2, 32), dtype=dtype)
+
+            spectres(new_wavs, spec_wavs, fluxes, fluxes if errs else None,
+                     backend=name, preserve_dtype=preserve, verbose=False)
+
+            # ParallelResampler uses separately compiled serial kernels
+            if releases_gil(name):
+                resample(old_edges, old_widths, new_edges, fluxes,
+                         fluxes if errs else None,
+                         dtype=dtype if preserve else None, _serial=True)
+
+        spectres(new_wavs, spec_wavs, np.ones(32), backend=name,
+                 workspace=Workspace(new_wavs, spec_wavs), verbose=False)
+
+        times[name] = time.perf_counter() - start_time
+
+    return times
+
+
+def build_aot(output_dir=None, dtypes=("float64", "float32")):
+    """ Build the _spectres_aot extension module, exporting the serial
+    resampling kernel for every combination of input and output data
+    types in dtypes, into output_dir (the spectres package by default).
+    Returns the path of the extension. """
+
+    from numba.pycc import CC
+    from .spectral_resampling_numba import _resample_kernel_serial
+
+    cc = CC("_spectres_aot")
+    cc.output_dir = output_dir or os.path.dirname(os.path.abspath(__file__))
+
+    codes = {"float64": "f8", "float32": "f4"}
+
+    for in_dtype, out_dtype in itertools.product(dtypes, repeat=2):
+        signature = ("void(intp[:, :], intp[:, :], f8[:, :], f8[:, :], "
+                     "b1[:, :], f8[:, :], {0}[:, :], {0}[:, :], b1, f8, "
+                     "intp[:], intp[:], intp[:], {1}[:, :], {1}[:, :])"
+                     .format(codes[in_dtype], codes[out_dtype]))
+
+        cc.export("resample_%s_%s" % (in_dtype, out_dtype),
+                  signature)(_resample_kernel_serial.py_func)
+
+    cc.compile()
+
+    return os.path.join(cc.output_dir, cc.output_file)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Compile the kernels used "
+                                     "by spectres ahead of time.")
+    parser.add_argument("--aot", action="store_true",
+                        help="Also build the _spectres_aot extension.")
+    parser.add_argument("--output-dir", help="Directory to build the "
+                        "extension in, the spectres package by default.")
+    args = parser.parse_args(args)
+
+    if args.aot:
+        print("Built %s" % build_aot(args.output_dir))
+
+        # The extension did not exist when the backends were registered
+        importlib.invalidate_caches()
+        register_lazy_backend("aot", "spectres.spectral_resampling_aot",
+                              "spectres._spectres_aot", priority=True)
+
+    for name, seconds in warmup().items():
+        print("Warmed up the %s backend in %.2f s" % (name, seconds))
+
+
+if __name__ == "__main__":
+    main()
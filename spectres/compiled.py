@@ -0,0 +1,133 @@
+from __future__ import print_function, division, absolute_import
+
+from functools import lru_cache
+
+import numpy as np
+
+from .spectral_resampling import find_overlaps
+
+
+@lru_cache(maxsize=64)
+def _flat_rows(shape, lead_shape):
+    """ Index of the row of an array with leading dimensions shape which
+    is used by each row of the flattened, broadcast lead_shape. These
+    are cached, as the same shapes are usually used call after call. """
+    rows = np.arange(int(np.prod(shape))).reshape(shape)
+    rows = np.broadcast_to(rows, lead_shape).ravel()
+    rows.flags.writeable = False
+
+    return rows
+
+
+@lru_cache(maxsize=None)
+def _placeholder(dtype):
+    """ Empty 2D array passed to the kernel in place of missing errors,
+    so the kernel never needs optional arguments. """
+    return np.zeros((0, 0), dtype=dtype)
+
+
+def _kernel_dtype(dtype):
+    """ Data type of the arrays the kernel writes, which are compiled for
+    float32 and float64 outputs. Other data types (e.g. float16 or
+    longdouble) are calculated in float64 and converted afterwards. """
+    dtype = np.dtype(dtype)
+
+    if dtype in (np.float32, np.float64):
+        return dtype
+
+    return np.dtype(float)
+
+
+def _kernel_output(out, shape, dtype):
+    """ Return a C-contiguous 2D array for the kernel to write into,
+    which is out itself where possible. """
+    if out is None:
+        return np.empty(shape, dtype=_kernel_dtype(dtype)).reshape(
+            -1, shape[-1])
+
+    if out.shape != shape:
+        raise ValueError("Output array has shape %s, expected %s."
+                         % (out.shape, shape))
+
+    if out.flags.c_contiguous and out.dtype == _kernel_dtype(out.dtype):
+        return out.reshape(-1, shape[-1])
+
+    return np.empty(shape, dtype=_kernel_dtype(out.dtype)).reshape(
+        -1, shape[-1])
+
+
+def _kernel_result(result, out, shape, dtype):
+    """ Reshape the array the kernel wrote into, converting it to dtype,
+    or copying it into out if that could not be written into directly. """
+    if out is None:
+        return result.reshape(shape).astype(dtype, copy=False)
+
+    if not np.may_share_memory(result, out):
+        out[...] = result.reshape(shape)
+
+    return out
+
+
+def _kernel_input(array):
+    """ Pass float32 and float64 arrays to the kernel as they are, and
+    convert anything else to float64. """
+    array = np.asarray(array)
+
+    if array.dtype not in (np.float32, np.float64):
+        return array.astype(float)
+
+    return array
+
+
+def compiled_resample(kernel, old_edges, old_widths, new_edges, old_fluxes,
+                      old_errs=None, fill=None, overlaps=None, dtype=None,
+                      out=None, out_errs=None):
+    """ Resampling engine which runs a compiled kernel with the
+    signature of _resample_kernel. The leading dimensions of old_fluxes
+    and the bin edges are flattened so that every spectrum can be
+    processed by one call to the kernel. """
+
+    if overlaps is None:
+        overlaps = find_overlaps(old_edges, old_widths, new_edges)
+
+    bin_shape = overlaps[0].shape[:-1]
+    n_new = overlaps[0].shape[-1]
+    n_old = old_widths.shape[-1]
+
+    start, stop, start_widths, stop_widths, inside = \
+        [a.reshape(-1, n_new) for a in overlaps]
+
+    lead_shape = np.broadcast_shapes(bin_shape, old_fluxes.shape[:-1])
+    bin_rows = _flat_rows(bin_shape, lead_shape)
+    width_rows = _flat_rows(old_widths.shape[:-1], lead_shape)
+    flux_rows = _flat_rows(old_fluxes.shape[:-1], lead_shape)
+
+    # The kernel accumulates in float64 whatever the output dtype is
+    dtype = float if dtype is None else dtype
+    new_shape = lead_shape + (n_new,)
+    fluxes_2d = _kernel_input(old_fluxes).reshape(-1, n_old)
+    new_fluxes = _kernel_output(out, new_shape, dtype)
+
+    if old_errs is not None:
+        errs_2d = _kernel_input(old_errs).reshape(-1, n_old)
+        new_errs = _kernel_output(out_errs, new_shape, dtype)
+
+    else:
+        errs_2d = _placeholder(fluxes_2d.dtype)
+        new_errs = _placeholder(new_fluxes.dtype)
+
+    fill = np.nan if fill is None else float(fill)
+
+    kernel(start, stop, start_widths, stop_widths, inside,
+           old_widths.reshape(-1, n_old), fluxes_2d, errs_2d,
+           old_errs is not None, fill, bin_rows, width_rows, flux_rows,
+           new_fluxes, new_errs)
+
+    new_fluxes = _kernel_result(new_fluxes, out, new_shape, dtype)
+
+    if old_errs is None:
+        return new_fluxes, None, overlaps[4]
+
+    new_errs = _kernel_result(new_errs, out_errs, new_shape, dtype)
+
+    return new_fluxes, new_errs, overlaps[4]
@@ -0,0 +1,105 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from .backends import get_backend, releases_gil
+from .spectral_resampling import (make_bins, find_overlaps, _warn_fill,
+                                  _output_dtype)
+
+
+def _resample_block(block_fluxes, block_errs=None, resample=None,
+                    grids=None, fill=None, new_dtype=None, serial=False):
+    """ Resample one block of spectra, stacking the new fluxes and
+    uncertainties along a new last axis if uncertainties are given.
+    Engines which release the GIL are passed _serial=True if serial. """
+    old_edges, old_widths, new_edges, overlaps = grids
+    extra = {"_serial": True} if serial else {}
+
+    new_fluxes, new_errs, inside = resample(
+        old_edges, old_widths, new_edges, block_fluxes, block_errs,
+        fill=fill, overlaps=overlaps, dtype=new_dtype, **extra)
+
+    if block_errs is None:
+        return new_fluxes
+
+    return np.stack([new_fluxes, new_errs], axis=-1)
+
+
+def spectres_lazy(new_wavs, spec_wavs, spec_fluxes, spec_errs=None,
+                  fill=None, verbose=True, backend="auto", dtype=None,
+                  preserve_dtype=False, lsf_sigma=None, resolution=None):
+    """
+    Resample spectra held in a chunked lazy array, returning lazy
+    arrays of the new fluxes (and uncertainties). Called by spectres
+    when spec_fluxes or spec_errs is a dask array. The bins and overlaps
+    depend only on the wavelength grids, so they are calculated once
+    here and shared by the task which resamples each block of spectra.
+    The blocks are resampled when the result is computed, in parallel
+    with each other on the dask scheduler. Blocks may be split along
+    any axis but the last, which is joined into one chunk as every new
+    bin may depend on any old bin.
+    """
+
+    import dask.array as da
+
+    spec_fluxes = da.asarray(spec_fluxes)
+
+    if spec_errs is not None:
+        spec_errs = da.asarray(spec_errs)
+
+        if spec_errs.shape != spec_fluxes.shape:
+            raise ValueError("If specified, spec_errs must be the same "
+                             "shape as spec_fluxes.")
+
+    # The grids are small compared to the spectra, so are computed now
+    new_wavs = np.asarray(new_wavs)
+    spec_wavs = np.asarray(spec_wavs)
+
+    if spec_wavs.ndim != 1 or new_wavs.ndim != 1:
+        raise ValueError("Lazy arrays can only be resampled if spec_wavs "
+                         "and new_wavs are 1D.")
+
+    old_edges, old_widths = make_bins(spec_wavs)
+    new_edges, new_widths = make_bins(new_wavs)
+    overlaps = find_overlaps(old_edges, old_widths, new_edges)
+
+    # The blocks already run in parallel with each other on the dask
+    # worker threads, so they use serial kernels
+    if lsf_sigma is None and resolution is None:
+        resample = get_backend(backend)
+        serial = releases_gil(backend)
+
+    else:
+        from .resampling_plan import ResamplingPlan
+
+        resample = ResamplingPlan(new_wavs, spec_wavs, fill=fill,
+                                  verbose=False, lsf_sigma=lsf_sigma,
+                                  resolution=resolution).engine
+        serial = False
+
+    if verbose and not np.all(overlaps[4][[0, -1]]):
+        _warn_fill()
+
+    dtype = _output_dtype(spec_fluxes, dtype, preserve_dtype)
+
+    # Every new bin may depend on every old bin of a spectrum
+    chunks = {spec_fluxes.ndim - 1: -1}
+    blocks = [spec_fluxes.rechunk(chunks)]
+    new_chunks = blocks[0].chunks[:-1] + ((new_wavs.shape[0],),)
+    extra = {}
+
+    if spec_errs is not None:
+        blocks.append(spec_errs.rechunk(blocks[0].chunks))
+        new_chunks += ((2,),)
+        extra["new_axis"] = spec_fluxes.ndim
+
+    new_values = da.map_blocks(
+        _resample_block, *blocks, resample=resample,
+        grids=(old_edges, old_widths, new_edges, overlaps), fill=fill,
+        new_dtype=dtype, serial=serial, dtype=dtype, chunks=new_chunks,
+        meta=np.empty((0,)*len(new_chunks), dtype=dtype), **extra)
+
+    if spec_errs is None:
+        return new_values
+
+    return new_values[..., 0], new_values[..., 1]
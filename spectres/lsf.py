@@ -0,0 +1,84 @@
+from __future__ import print_function, division, absolute_import
+
+import math
+
+import numpy as np
+
+
+# The line-spread function is truncated at this many standard deviations
+n_sigma = 6.
+
+# Ratio of the full width at half maximum of a Gaussian to its sigma
+fwhm_sigma = 2.*math.sqrt(2.*math.log(2.))
+
+
+def _psi(u):
+    """ Integral of the standard normal CDF, u*Phi(u) + phi(u). """
+
+    # SciPy is only imported when a line-spread function is used
+    try:
+        from scipy.special import erf
+
+    except ImportError:
+        erf = np.frompyfunc(math.erf, 1, 1)
+
+    cdf = 0.5*(1. + np.asarray(erf(u/math.sqrt(2.)), dtype=float))
+    return u*cdf + np.exp(-0.5*u**2)/math.sqrt(2.*math.pi)
+
+
+def lsf_sigmas(new_wavs, lsf_sigma=None, resolution=None):
+    """ Return the standard deviation of the Gaussian line-spread
+    function at each new wavelength, from either lsf_sigma or a
+    resolving power R = wavelength/FWHM. """
+    if resolution is not None:
+        sigma = new_wavs/(np.asarray(resolution, dtype=float)*fwhm_sigma)
+
+    else:
+        sigma = np.asarray(lsf_sigma, dtype=float)
+
+    sigma = np.broadcast_to(sigma, new_wavs.shape)
+
+    if np.any(sigma <= 0.):
+        raise ValueError("The line-spread function must have a positive "
+                         "width.")
+
+    return sigma
+
+
+def lsf_weights(old_edges, new_edges, sigma, inside):
+    """ Build the CSR weight matrix which convolves a spectrum, constant
+    across each old bin, with a Gaussian of width sigma[j] and averages
+    the result over new bin j. Returns indptr, indices and weights, the
+    weights in each row being normalised to sum to one. """
+
+    n_old = old_edges.shape[0] - 1
+    lower, upper = new_edges[:-1], new_edges[1:]
+
+    # Old bins within n_sigma of each new bin
+    first = np.searchsorted(old_edges, lower - n_sigma*sigma, side="right")
+    last = np.searchsorted(old_edges, upper + n_sigma*sigma, side="left")
+    first = np.clip(first - 1, 0, n_old)
+    last = np.clip(last, 0, n_old)
+
+    counts = np.where(inside, last - first, 0)
+    indptr = np.zeros(counts.shape[0]+1, dtype=np.intp)
+    np.cumsum(counts, out=indptr[1:])
+
+    rows = np.repeat(np.arange(counts.shape[0]), counts)
+    indices = first[rows] + np.arange(indptr[-1]) - indptr[rows]
+
+    # The mean over [c, d] of a top-hat over [a, b] convolved with a
+    # Gaussian is sigma*(Psi((d-a)/s) - Psi((c-a)/s) - Psi((d-b)/s)
+    # + Psi((c-b)/s))/(d-c), where Psi is the integral of the normal CDF
+    a, b = old_edges[indices], old_edges[indices+1]
+    c, d, s = lower[rows], upper[rows], sigma[rows]
+
+    weights = (_psi((d - a)/s) - _psi((c - a)/s) - _psi((d - b)/s)
+               + _psi((c - b)/s))*s/(d - c)
+
+    # Renormalise for the part of the kernel lost off the ends
+    if indptr[-1]:
+        weights /= np.repeat(np.add.reduceat(weights, indptr[:-1][inside]),
+                             counts[inside])
+
+    return indptr, indices, weights
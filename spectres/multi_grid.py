@@ -0,0 +1,115 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from .backends import get_backend, resolve_backend
+from .spectral_resampling import (make_bins, _warn_fill, _output_dtype,
+                                  _edge_overlaps, _numpy_resample,
+                                  _resampling_prefix)
+
+
+def spectres_multi(list_of_new_wavs, spec_wavs, spec_fluxes, spec_errs=None,
+                   fill=None, verbose=True, backend="numpy", dtype=None,
+                   preserve_dtype=False):
+    """
+    Function for resampling spectra (and optionally associated
+    uncertainties) onto several new wavelength bases in a single call,
+    e.g. the different arms or resolutions of a spectrograph. The
+    result for each new basis is the same as that of spectres(new_wavs,
+    spec_wavs, spec_fluxes).
+
+    Parameters
+    ----------
+
+    list_of_new_wavs : list
+        List of 1D arrays, each containing a new wavelength sampling
+        desired for the spectrum or spectra.
+
+    spec_wavs : numpy.ndarray
+        1D array containing the current wavelength sampling of the
+        spectrum or spectra.
+
+    spec_fluxes : numpy.ndarray
+        Array containing spectral fluxes at the wavelengths specified in
+        spec_wavs, last dimension must correspond to the shape of
+        spec_wavs. Extra dimensions before this may be used to include
+        multiple spectra.
+
+    spec_errs : numpy.ndarray (optional)
+        Array of the same shape as spec_fluxes containing uncertainties
+        associated with each spectral flux value.
+
+    fill : float (optional)
+        Where a new_wavs extends outside the wavelength range in
+        spec_wavs this value will be used as a filler in new_fluxes and
+        new_errs.
+
+    verbose : bool (optional)
+        Setting verbose to False will suppress the default warning about
+        new_wavs extending outside spec_wavs and "fill" being used.
+
+    backend : str (optional)
+        Name of the resampling engine to use. The default NumPy engine
+        calculates float64 prefix sums of the spectra once, so each new
+        wavelength basis only costs a lookup at its bin edges. As the
+        sums are differences of prefix sums, uncertainties spanning many
+        orders of magnitude are less precise than from spectres.
+
+    dtype : numpy.dtype (optional)
+        Data type of new_fluxes and new_errs, float64 by default.
+
+    preserve_dtype : bool (optional)
+        If True (and dtype is not set) new_fluxes and new_errs have the
+        same data type as spec_fluxes.
+
+    Returns
+    -------
+
+    results : list
+        One entry for each array in list_of_new_wavs, containing what
+        spectres would return for it: new_fluxes, or a tuple of
+        new_fluxes and new_errs if spec_errs was specified.
+    """
+
+    if spec_errs is not None and spec_errs.shape != spec_fluxes.shape:
+        raise ValueError("If specified, spec_errs must be the same shape "
+                         "as spec_fluxes.")
+
+    old_edges, old_widths = make_bins(spec_wavs)
+    dtype = _output_dtype(spec_fluxes, dtype, preserve_dtype)
+
+    # The NumPy engine sums over spec_wavs once rather than for each basis
+    use_prefix = resolve_backend(backend) == "numpy"
+
+    if use_prefix:
+        prefix = _resampling_prefix(old_widths, spec_fluxes, spec_errs)
+
+    else:
+        resample = get_backend(backend)
+
+    results = []
+
+    for new_wavs in list_of_new_wavs:
+        new_edges = make_bins(np.asarray(new_wavs))[0]
+        overlaps = _edge_overlaps(old_edges, old_widths, new_edges)
+
+        if use_prefix:
+            new_fluxes, new_errs, inside = _numpy_resample(
+                old_edges, old_widths, new_edges, spec_fluxes, spec_errs,
+                fill=fill, overlaps=overlaps, dtype=dtype, _prefix=prefix)
+
+        else:
+            new_fluxes, new_errs, inside = resample(
+                old_edges, old_widths, new_edges, spec_fluxes, spec_errs,
+                fill=fill, overlaps=overlaps, dtype=dtype)
+
+        if verbose and not np.all(inside[..., [0, -1]]):
+            _warn_fill()
+
+        if spec_errs is None:
+            results.append(new_fluxes)
+
+        else:
+            results.append((new_fluxes, new_errs))
+
+    return results
@@ -0,0 +1,348 @@
+from __future__ import print_function, division, absolute_import
+
+import os
+import time
+
+import numpy as np
+
+from .backends import get_backend, resolve_backend, releases_gil
+from .spectral_resampling import (make_bins, find_overlaps, grid_type,
+                                  _warn_fill, _output_dtype)
+
+
+# Grids and overlaps set up once in each worker process by _init_worker
+_worker_state = {}
+
+
+def _init_worker(old_edges, old_widths, new_edges, overlaps, backend, fill):
+    _worker_state.update(old_edges=old_edges, old_widths=old_widths,
+                         new_edges=new_edges, overlaps=overlaps,
+                         backend=backend, fill=fill)
+
+
+def _resample_rows(state, fluxes, errs, new_fluxes, new_errs, first, last,
+                   clock=time.thread_time):
+    """ Resample rows first:last of 2D fluxes (and errs) into the output
+    arrays, returning the CPU time taken according to clock. """
+    start_time = clock()
+    rows = slice(first, last)
+
+    # The workers already run in parallel with each other
+    extra = {"_serial": True} if releases_gil(state["backend"]) else {}
+
+    resample = get_backend(state["backend"])
+    block_fluxes, block_errs, inside = resample(
+        state["old_edges"], state["old_widths"], state["new_edges"],
+        fluxes[rows], None if errs is None else errs[rows],
+        fill=state["fill"], overlaps=state["overlaps"],
+        dtype=new_fluxes.dtype, **extra)
+
+    new_fluxes[rows] = block_fluxes
+
+    if errs is not None:
+        new_errs[rows] = block_errs
+
+    return clock() - start_time
+
+
+def _process_task(names, layouts, first, last):
+    """ Resample rows first:last in a worker process, reading the input
+    from and writing the output into shared memory blocks, the shapes
+    and dtypes of which are given by layouts. """
+    from multiprocessing.shared_memory import SharedMemory
+
+    blocks = [None if name is None else SharedMemory(name=name)
+              for name in names]
+    arrays = [None if block is None else
+              np.ndarray(layout[0], dtype=layout[1], buffer=block.buf)
+              for block, layout in zip(blocks, layouts)]
+
+    try:
+        return _resample_rows(_worker_state, *arrays, first=first, last=last,
+                              clock=time.process_time)
+
+    finally:
+        # The arrays must be released before the blocks can be closed
+        del arrays[:]
+        for block in blocks:
+            if block is not None:
+                block.close()
+
+
+class ParallelResampler(object):
+    """
+    Resampler which splits the spectra it is given between several
+    workers. If the backend releases the GIL (as the Numba backend does)
+    the workers are threads, otherwise they are processes which read
+    the spectra from and write the results into shared memory. The
+    worker pool is kept between calls, so a ParallelResampler can be
+    reused by long-running services, and should be closed (or used as a
+    context manager) when it is no longer needed.
+
+    Parameters
+    ----------
+
+    new_wavs : numpy.ndarray
+        1D array containing the new wavelength sampling desired for the
+        spectra.
+
+    spec_wavs : numpy.ndarray
+        1D array containing the current wavelength sampling of the
+        spectra.
+
+    n_jobs : int (optional)
+        Number of workers to use, -1 (the default) uses one per CPU.
+
+    fill : float (optional)
+        Where new_wavs extends outside the wavelength range in spec_wavs
+        this value will be used as a filler in new_fluxes and new_errs.
+
+    verbose : bool (optional)
+        Setting verbose to False will suppress the default warning about
+        new_wavs extending outside spec_wavs and "fill" being used.
+
+    backend : str (optional)
+        Name of the resampling engine to use, see available_backends.
+
+    use_threads : bool (optional)
+        Force the use of threads (True) or processes (False) rather
+        than choosing based on the backend.
+
+    dtype : numpy.dtype (optional)
+        Data type of new_fluxes and new_errs, float64 by default.
+
+    preserve_dtype : bool (optional)
+        If True (and dtype is not set) new_fluxes and new_errs have the
+        same data type as spec_fluxes.
+
+    grid : str (optional)
+        "linear" or "log" if spec_wavs is uniformly spaced in
+        wavelength or log(wavelength), or "auto" to detect this, as in
+        spectres.
+
+    Attributes
+    ----------
+
+    stats : dict
+        Timings for the most recent call: the wall time, the total CPU
+        time used by the workers, the speedup (their ratio) and the
+        scaling efficiency (speedup divided by n_jobs).
+
+    setup_times : dict
+        Time taken to make the bins and find the overlaps when the
+        ParallelResampler was created.
+    """
+
+    def __init__(self, new_wavs, spec_wavs, n_jobs=-1, fill=None,
+                 verbose=True, backend="auto", use_threads=None,
+                 dtype=None, preserve_dtype=False, grid=None):
+
+        self.n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+        self.backend = resolve_backend(backend)
+        self.n_new = new_wavs.shape[0]
+        self.n_old = spec_wavs.shape[0]
+        self.dtype = dtype
+        self.preserve_dtype = preserve_dtype
+        self.stats = {}
+
+        if use_threads is None:
+            use_threads = releases_gil(self.backend)
+
+        self.use_threads = use_threads
+
+        if grid == "auto":
+            grid = grid_type(spec_wavs)
+
+        start_time = time.perf_counter()
+        old_edges, old_widths = make_bins(spec_wavs)
+        new_edges, new_widths = make_bins(new_wavs)
+        bins_time = time.perf_counter()
+
+        overlaps = find_overlaps(old_edges, old_widths, new_edges, grid=grid)
+        self.setup_times = {"bins": bins_time - start_time,
+                            "overlaps": time.perf_counter() - bins_time}
+
+        if verbose and not np.all(overlaps[4][[0, -1]]):
+            _warn_fill()
+
+        self._state = dict(old_edges=old_edges, old_widths=old_widths,
+                           new_edges=new_edges, overlaps=overlaps,
+                           backend=self.backend, fill=fill)
+
+        if self.use_threads:
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(self.n_jobs)
+
+        # Spawn rather than fork, as forking a process which has started
+        # threads (e.g. for Numba or BLAS) is not safe
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            from multiprocessing import get_context
+            self._pool = ProcessPoolExecutor(
+                self.n_jobs, mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(old_edges, old_widths, new_edges, overlaps,
+                          self.backend, fill))
+
+    def _row_ranges(self, n_rows):
+        """ Split n_rows into one contiguous range per worker. """
+        bounds = np.linspace(0, n_rows, min(self.n_jobs, n_rows)+1)
+        bounds = bounds.astype(int)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _run_threads(self, arrays):
+        futures = [self._pool.submit(_resample_rows, self._state, *arrays,
+                                     first=first, last=last)
+                   for first, last in self._row_ranges(arrays[0].shape[0])]
+
+        return [future.result() for future in futures]
+
+    def _run_processes(self, arrays):
+        from multiprocessing.shared_memory import SharedMemory
+
+        blocks = [None if array is None else
+                  SharedMemory(create=True, size=max(array.nbytes, 1))
+                  for array in arrays]
+
+        shared = [None if block is None else
+                  np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                  for block, array in zip(blocks, arrays)]
+
+        try:
+            # Only the inputs need copying into shared memory
+            for array, shared_array in zip(arrays[:2], shared[:2]):
+                if array is not None:
+                    shared_array[:] = array
+
+            names = [None if block is None else block.name
+                     for block in blocks]
+            layouts = [None if array is None else (array.shape, array.dtype)
+                       for array in arrays]
+
+            futures = [self._pool.submit(_process_task, names, layouts,
+                                         first, last)
+                       for first, last in
+                       self._row_ranges(arrays[0].shape[0])]
+
+            times = [future.result() for future in futures]
+
+            for array, shared_array in zip(arrays[2:], shared[2:]):
+                if array is not None:
+                    array[:] = shared_array
+
+        finally:
+            del shared[:]
+            for block in blocks:
+                if block is not None:
+                    block.close()
+                    block.unlink()
+
+        return times
+
+    def _output(self, out, n_rows, dtype):
+        """ Return a 2D array of rows for the workers to write into,
+        a view of out where possible. """
+        if out is None:
+            return np.zeros((n_rows, self.n_new), dtype=dtype)
+
+        if out.flags.c_contiguous:
+            return out.reshape(n_rows, self.n_new)
+
+        return np.zeros((n_rows, self.n_new), dtype=out.dtype)
+
+    def __call__(self, spec_fluxes, spec_errs=None, out=None, out_errs=None):
+        """
+        Resample spectra (and optionally associated uncertainties),
+        returning the same outputs as spectres.
+
+        Parameters
+        ----------
+
+        spec_fluxes : numpy.ndarray
+            Array containing spectral fluxes at the wavelengths
+            specified in spec_wavs, last dimension must correspond to
+            the shape of spec_wavs. The leading dimensions are split
+            between the workers.
+
+        spec_errs : numpy.ndarray (optional)
+            Array of the same shape as spec_fluxes containing
+            uncertainties associated with each spectral flux value.
+
+        out, out_errs : numpy.ndarray (optional)
+            Arrays to write new_fluxes and new_errs into, as in
+            spectres, which are then returned.
+        """
+
+        if spec_errs is not None and spec_errs.shape != spec_fluxes.shape:
+            raise ValueError("If specified, spec_errs must be the same shape "
+                             "as spec_fluxes.")
+
+        new_shape = spec_fluxes.shape[:-1] + (self.n_new,)
+
+        for array in (out, out_errs):
+            if array is not None and array.shape != new_shape:
+                raise ValueError("Output array has shape %s, expected %s."
+                                 % (array.shape, new_shape))
+
+        dtype = self.dtype
+
+        if dtype is None and out is not None:
+            dtype = out.dtype
+
+        dtype = _output_dtype(spec_fluxes, dtype, self.preserve_dtype)
+
+        fluxes = np.asarray(spec_fluxes).reshape(-1, self.n_old)
+        errs = None
+        new_fluxes = self._output(out, fluxes.shape[0], dtype)
+        new_errs = None
+
+        if spec_errs is not None:
+            errs = np.asarray(spec_errs).reshape(-1, self.n_old)
+            new_errs = self._output(out_errs, fluxes.shape[0], dtype)
+
+        wall_time = time.perf_counter()
+
+        if self.use_threads:
+            times = self._run_threads([fluxes, errs, new_fluxes, new_errs])
+
+        else:
+            times = self._run_processes([fluxes, errs, new_fluxes, new_errs])
+
+        wall_time = time.perf_counter() - wall_time
+        speedup = sum(times)/wall_time
+
+        self.stats = {"n_jobs": self.n_jobs, "wall_time": wall_time,
+                      "worker_time": sum(times), "speedup": speedup,
+                      "efficiency": speedup/self.n_jobs}
+
+        new_fluxes = new_fluxes.reshape(new_shape)
+
+        # Copy into outputs which could not be written into directly
+        if out is not None:
+            if not np.shares_memory(out, new_fluxes):
+                out[...] = new_fluxes
+
+            new_fluxes = out
+
+        if spec_errs is None:
+            return new_fluxes
+
+        new_errs = new_errs.reshape(new_shape)
+
+        if out_errs is not None:
+            if not np.shares_memory(out_errs, new_errs):
+                out_errs[...] = new_errs
+
+            new_errs = out_errs
+
+        return new_fluxes, new_errs
+
+    def close(self):
+        """ Shut down the pool of workers. """
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,198 @@
+from __future__ import print_function, division, absolute_import
+
+import warnings
+
+import numpy as np
+
+from .resampling_plan import _matvec
+from .spectral_resampling import make_bins
+
+
+def _curve_columns(curve):
+    """ Return the wavelengths and transmission of a filter curve given
+    as a two column array or a pair of 1D arrays, sorted by wavelength. """
+    if isinstance(curve, np.ndarray) and curve.ndim == 2:
+        curve = curve.T
+
+    filter_wavs, transmission = (np.asarray(column, dtype=float)
+                                 for column in curve)
+    order = np.argsort(filter_wavs)
+
+    return filter_wavs[order], transmission[order]
+
+
+def _bin_integrals(filter_wavs, transmission, old_edges):
+    """ Integrate a transmission curve, linearly interpolated between its
+    points and zero outside them, over each old bin. """
+
+    inner = old_edges[(old_edges > filter_wavs[0])
+                      & (old_edges < filter_wavs[-1])]
+    grid = np.union1d(filter_wavs, inner)
+    values = np.interp(grid, filter_wavs, transmission, left=0., right=0.)
+
+    cumulative = np.zeros(grid.shape[0])
+    np.cumsum(np.diff(grid)*(values[1:] + values[:-1])/2.,
+              out=cumulative[1:])
+
+    # Every old edge inside the curve is a point of grid, so this is exact
+    return np.diff(np.interp(old_edges, grid, cumulative)), cumulative[-1]
+
+
+class FilterSet(object):
+    """
+    Set of filter transmission curves, with precomputed weights for
+    integrating spectra sampled at spec_wavs through each filter. The
+    spectra are treated as constant across each of their bins, as in
+    spectres, and the transmission curves as linear between their
+    points, so the band flux is the transmission-weighted mean of the
+    spectrum over each filter. Calling the FilterSet returns the band
+    fluxes of every spectrum in every filter with one sparse product.
+
+    Parameters
+    ----------
+
+    filter_curves : list
+        List with one entry for each filter, either a 2D array whose
+        columns are wavelength and transmission or a tuple of 1D arrays
+        (wavelengths, transmission). Wavelengths must be in the same
+        units as spec_wavs.
+
+    spec_wavs : numpy.ndarray
+        1D array containing the wavelength sampling of the spectra
+        which will be passed to the FilterSet.
+
+    photon_counting : bool (optional)
+        If True (the default) the transmission is weighted by
+        wavelength, as is appropriate for photon-counting detectors and
+        fluxes per unit wavelength.
+
+    fill : float (optional)
+        Band flux (and uncertainty) for filters which extend outside
+        the wavelength range in spec_wavs.
+
+    verbose : bool (optional)
+        Setting verbose to False will suppress the warning about
+        filters extending outside spec_wavs and "fill" being used.
+
+    Attributes
+    ----------
+
+    indptr, indices, weights : numpy.ndarray
+        CSR representation of the (n_filters, len(spec_wavs)) weight
+        matrix. The weights for each filter sum to one.
+
+    mean_wavs : numpy.ndarray
+        Weighted mean wavelength of each filter.
+
+    inside : numpy.ndarray
+        Boolean array, True for filters which lie within spec_wavs.
+    """
+
+    def __init__(self, filter_curves, spec_wavs, photon_counting=True,
+                 fill=None, verbose=True):
+
+        self.spec_wavs = np.asarray(spec_wavs)
+        self.fill = np.nan if fill is None else fill
+        self.shape = (len(filter_curves), self.spec_wavs.shape[0])
+
+        old_edges, old_widths = make_bins(self.spec_wavs)
+        mids = (old_edges[1:] + old_edges[:-1])/2.
+
+        indptr = np.zeros(self.shape[0]+1, dtype=np.intp)
+        indices = []
+        weights = []
+        inside = np.zeros(self.shape[0], dtype=bool)
+
+        for i, curve in enumerate(filter_curves):
+            filter_wavs, transmission = _curve_columns(curve)
+
+            if photon_counting:
+                transmission = transmission*filter_wavs
+
+            integrals, total = _bin_integrals(filter_wavs, transmission,
+                                              old_edges)
+
+            nonzero = np.flatnonzero(integrals)
+            inside[i] = (nonzero.shape[0] > 0
+                         and np.isclose(integrals.sum(), total, rtol=1e-10))
+
+            indptr[i+1] = indptr[i]
+
+            if inside[i]:
+                first, last = nonzero[0], nonzero[-1] + 1
+                indices.append(np.arange(first, last))
+                weights.append(integrals[first:last]/integrals.sum())
+                indptr[i+1] += last - first
+
+        if verbose and not np.all(inside):
+            warnings.warn(
+                "Spectres: some filters extend outside the range in "
+                "spec_wavs, their band fluxes will be set to the value of "
+                "the 'fill' keyword argument (by default nan).",
+                category=RuntimeWarning,
+            )
+
+        self.indptr = indptr
+        self.indices = np.concatenate(indices + [np.zeros(0, dtype=np.intp)])
+        self.weights = np.concatenate(weights + [np.zeros(0)])
+        self.inside = inside
+
+        self.rows = np.flatnonzero(inside)
+        self.row_starts = indptr[:-1][inside]
+
+        self.mean_wavs = np.full(self.shape[0], np.nan)
+        self.mean_wavs[inside] = _matvec(self, mids, self.weights)[inside]
+
+    def __call__(self, spec_fluxes, spec_errs=None):
+        """
+        Calculate the band fluxes (and optionally uncertainties) of
+        spectra in every filter.
+
+        Parameters
+        ----------
+
+        spec_fluxes : numpy.ndarray
+            Array containing spectral fluxes at the wavelengths
+            specified in spec_wavs, last dimension must correspond to
+            the shape of spec_wavs. Extra dimensions before this may be
+            used to include multiple spectra.
+
+        spec_errs : numpy.ndarray (optional)
+            Array of the same shape as spec_fluxes containing
+            independent uncertainties associated with each spectral
+            flux value.
+
+        Returns
+        -------
+
+        band_fluxes : numpy.ndarray
+            Array of band fluxes, last dimension is the number of
+            filters, other dimensions are the same as spec_fluxes.
+
+        band_errs : numpy.ndarray
+            Array of uncertainties associated with band_fluxes. Only
+            returned if spec_errs was specified.
+        """
+
+        spec_fluxes = np.asarray(spec_fluxes)
+
+        if spec_fluxes.shape[-1] != self.shape[1]:
+            raise ValueError("The last dimension of spec_fluxes must be the "
+                             "same length as spec_wavs.")
+
+        band_fluxes = _matvec(self, spec_fluxes, self.weights)
+        band_fluxes[..., ~self.inside] = self.fill
+
+        if spec_errs is None:
+            return band_fluxes
+
+        spec_errs = np.asarray(spec_errs)
+
+        if spec_errs.shape != spec_fluxes.shape:
+            raise ValueError("If specified, spec_errs must be the same shape "
+                             "as spec_fluxes.")
+
+        band_errs = np.sqrt(_matvec(self, spec_errs**2, self.weights**2))
+        band_errs[..., ~self.inside] = self.fill
+
+        return band_fluxes, band_errs
@@ -0,0 +1,166 @@
+from __future__ import print_function, division, absolute_import
+
+import threading
+import tracemalloc
+
+
+# Profiles which are currently recording, see profile
+_active = []
+_lock = threading.Lock()
+
+# Phases timed for each call of spectres, in the order they happen
+phases = ("bins", "overlaps", "resample", "post")
+
+
+def profiling():
+    """ Return True if any profile is recording. """
+    return bool(_active)
+
+
+def report(record, stats=None):
+    """ Pass the record of a call to the stats callback (if given) and
+    every recording profile. """
+    if stats is not None:
+        stats(record)
+
+    with _lock:
+        for profile in _active:
+            profile.calls.append(record)
+
+
+def start_memory():
+    """ Reset the peak of the memory traced by tracemalloc, returning the
+    memory currently allocated, or None if memory is not being traced. """
+    if not tracemalloc.is_tracing():
+        return None
+
+    tracemalloc.reset_peak()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def peak_memory(memory):
+    """ Return the peak memory allocated since start_memory. """
+    return tracemalloc.get_traced_memory()[1] - memory
+
+
+class Profile(object):
+    """
+    Record of the calls made to spectres while a profile is active,
+    returned by spectres.profile. Each entry of calls is a dictionary
+    with the keys:
+
+    times : dict
+        Wall time in seconds spent making the bins, searching for the
+        overlaps, resampling (including filling new bins outside
+        spec_wavs) and in any post-processing (masks and covariances),
+        plus the total. Time spent fetching the bins and overlaps from
+        the cache or a workspace is counted under overlaps.
+
+    bytes : int
+        Total size of the arrays allocated for the bins, overlaps and
+        outputs.
+
+    peak_bytes : int
+        Peak memory allocated during the call, including temporary
+        arrays. Only recorded if trace_memory is True.
+
+    n_filled : int
+        Number of new bins (over all spectra) set to fill because they
+        lie outside spec_wavs.
+
+    pixels_per_bin : float
+        Average number of old bins which overlap each new bin.
+
+    backend : str
+        Name of the backend used.
+
+    n_spectra, n_old, n_new : int
+        Number of spectra and the lengths of their old and new grids.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.calls = []
+        self._started_tracing = False
+
+    def summary(self):
+        """ Return the number of calls, the total time spent in each
+        phase, the total number of filled bins, the mean number of old
+        bins per new bin and the number of calls to each backend. """
+        totals = dict((phase, 0.) for phase in phases + ("total",))
+        backends = {}
+
+        for call in self.calls:
+            for phase, time in call["times"].items():
+                totals[phase] += time
+
+            backends[call["backend"]] = backends.get(call["backend"], 0) + 1
+
+        n_calls = len(self.calls)
+        pixels = sum(call["pixels_per_bin"] for call in self.calls)
+
+        return {"n_calls": n_calls, "times": totals,
+                "bytes": sum(call["bytes"] for call in self.calls),
+                "n_filled": sum(call["n_filled"] for call in self.calls),
+                "pixels_per_bin": pixels/n_calls if n_calls else 0.,
+                "backends": backends}
+
+    def __str__(self):
+        summary = self.summary()
+        total = summary["times"]["total"]
+        lines = ["%d calls, %.6f s in total" % (summary["n_calls"], total)]
+
+        for phase in phases:
+            time = summary["times"][phase]
+            share = 100*time/total if total else 0.
+            lines.append("  %-10s %12.6f s %6.1f%%" % (phase, time, share))
+
+        lines.append("%d bytes allocated, %d bins filled, %.2f old bins "
+                     "per new bin" % (summary["bytes"], summary["n_filled"],
+                                      summary["pixels_per_bin"]))
+        lines.append("backends: %s" % summary["backends"])
+
+        return "\n".join(lines)
+
+    def __enter__(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        with _lock:
+            _active.append(self)
+
+        return self
+
+    def __exit__(self, *args):
+        with _lock:
+            _active.remove(self)
+
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def profile(trace_memory=False):
+    """
+    Context manager recording the time spent in each phase of every
+    call to spectres, along with the memory allocated, number of filled
+    bins and backend used. When no profile is active (and no stats
+    callback is passed to spectres) nothing is recorded.
+
+    Parameters
+    ----------
+
+    trace_memory : bool (optional)
+        If True also record the peak memory allocated by each call
+        using tracemalloc, which slows the calls down.
+
+    Returns
+    -------
+
+    profile : spectres.profiling.Profile
+        Object whose calls attribute collects a record of each call,
+        and which can be summarised with summary() or printed.
+    """
+
+    return Profile(trace_memory=trace_memory)
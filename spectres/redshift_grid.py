@@ -0,0 +1,107 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from .backends import get_backend, resolve_backend
+from .spectral_resampling import (make_bins, _warn_fill, _edge_overlaps,
+                                  _numpy_resample, _resampling_prefix)
+
+
+def spectres_redshift_grid(new_wavs, rest_wavs, spec_fluxes, z_array,
+                           spec_errs=None, fill=None, verbose=True,
+                           backend="numpy"):
+    """
+    Function for resampling rest-frame spectra (and optionally
+    associated uncertainties) onto a new wavelength basis at many
+    different redshifts in a single call. The result for each redshift
+    is the same as that of spectres(new_wavs, rest_wavs*(1+z),
+    spec_fluxes).
+
+    Parameters
+    ----------
+
+    new_wavs : numpy.ndarray
+        1D array containing the new (observed-frame) wavelength
+        sampling desired for the spectrum or spectra.
+
+    rest_wavs : numpy.ndarray
+        1D array containing the rest-frame wavelength sampling of the
+        spectrum or spectra.
+
+    spec_fluxes : numpy.ndarray
+        Array containing spectral fluxes at the wavelengths specified in
+        rest_wavs, last dimension must correspond to the shape of
+        rest_wavs. Extra dimensions before this may be used to include
+        multiple spectra.
+
+    z_array : numpy.ndarray
+        1D array of redshifts at which to resample the spectra.
+
+    spec_errs : numpy.ndarray (optional)
+        Array of the same shape as spec_fluxes containing uncertainties
+        associated with each spectral flux value.
+
+    fill : float (optional)
+        Where new_wavs extends outside the redshifted wavelength range
+        of rest_wavs this value will be used as a filler in new_fluxes
+        and new_errs.
+
+    verbose : bool (optional)
+        Setting verbose to False will suppress the default warning about
+        new_wavs extending outside rest_wavs and "fill" being used.
+
+    backend : str (optional)
+        Name of the resampling engine to use. The default NumPy engine
+        calculates float64 prefix sums of the spectra once, so each
+        redshift only costs a lookup at the new bin edges. As the sums
+        are differences of prefix sums, uncertainties spanning many
+        orders of magnitude are less precise than from spectres.
+
+    Returns
+    -------
+
+    new_fluxes : numpy.ndarray
+        Array of resampled flux values with shape (len(z_array), ...,
+        len(new_wavs)), where the middle dimensions are the leading
+        dimensions of spec_fluxes.
+
+    new_errs : numpy.ndarray
+        Array of uncertainties associated with fluxes in new_fluxes.
+        Only returned if spec_errs was specified.
+    """
+
+    z_array = np.asarray(z_array, dtype=float)
+
+    if spec_errs is not None and spec_errs.shape != spec_fluxes.shape:
+        raise ValueError("If specified, spec_errs must be the same shape "
+                         "as spec_fluxes.")
+
+    old_edges, old_widths = make_bins(rest_wavs)
+    new_edges, new_widths = make_bins(new_wavs)
+
+    # Redshifting stretches the rest-frame bins by (1+z), which is the
+    # same as shrinking the new bins by (1+z) in the rest frame.
+    z_shape = z_array.shape + (1,)*(spec_fluxes.ndim-1) + (1,)
+    new_edges = new_edges/(1. + z_array.reshape(z_shape))
+
+    if resolve_backend(backend) == "numpy":
+        new_fluxes, new_errs, inside = _numpy_resample(
+            old_edges, old_widths, new_edges, spec_fluxes, spec_errs,
+            fill=fill, overlaps=_edge_overlaps(old_edges, old_widths,
+                                               new_edges),
+            _prefix=_resampling_prefix(old_widths, spec_fluxes, spec_errs))
+
+    else:
+        resample = get_backend(backend)
+        new_fluxes, new_errs, inside = resample(
+            old_edges, old_widths, new_edges, spec_fluxes, spec_errs,
+            fill=fill)
+
+    if verbose and not np.all(inside[..., [0, -1]]):
+        _warn_fill()
+
+    if spec_errs is not None:
+        return new_fluxes, new_errs
+
+    else:
+        return new_fluxes
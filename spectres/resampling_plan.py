@@ -0,0 +1,461 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from .lsf import lsf_sigmas, lsf_weights
+from .spectral_resampling import make_bins, find_overlaps, _warn_fill, _store
+
+
+def _csr_weights(old_widths, overlaps):
+    """ Build the CSR representation of the normalised weight matrix
+    from the overlaps of a pair of 1D grids, returning indptr, indices,
+    weights and the number of old bins in each row. """
+
+    start, stop, start_widths, stop_widths, inside = overlaps
+
+    # Number of old bins contributing to each new bin
+    counts = np.where(inside, stop - start + 1, 0)
+    indptr = np.zeros(counts.shape[0]+1, dtype=np.intp)
+    np.cumsum(counts, out=indptr[1:])
+
+    rows = np.repeat(np.arange(counts.shape[0]), counts)
+    indices = start[rows] + np.arange(indptr[-1]) - indptr[rows]
+    weights = old_widths[indices]
+
+    # Multiply the first and last old bin widths by P_ij, where a
+    # new bin is fully inside an old bin it takes that bin's value
+    partial = inside & (stop > start)
+    weights[indptr[:-1][partial]] = start_widths[partial]
+    weights[indptr[1:][partial]-1] = stop_widths[partial]
+    weights[indptr[:-1][inside & (stop == start)]] = 1.
+
+    if indptr[-1]:
+        weights /= np.repeat(np.add.reduceat(weights, indptr[:-1][inside]),
+                             counts[inside])
+
+    return indptr, indices, weights, counts
+
+
+def _banded_covariance(indptr, weights, start, inside, in_bands, fill=None):
+    """ Calculate the covariance W C W^T of the new bins, where W is the
+    CSR weight matrix and C the covariance of the old bins. Both
+    covariances are in lower banded form, with [..., q, k] holding
+    C[k+q, k] (the layout used by scipy.linalg.solveh_banded). """
+
+    counts = np.diff(indptr)
+    n_new = counts.shape[0]
+    n_old = in_bands.shape[-1]
+    p = in_bands.shape[-2] - 1
+
+    # Rows of W padded by p either side, column m of row i is old bin
+    # first[i] + m, so every row of W C fits in the same layout
+    width = (counts.max() if n_new else 0) + 2*p
+    rows = np.repeat(np.arange(n_new), counts)
+    padded = np.zeros((n_new, width))
+    padded[rows, np.arange(indptr[-1]) - indptr[rows] + p] = weights
+
+    first = np.where(inside, start, 0) - p
+    cols = first[:, np.newaxis] + np.arange(width)
+
+    # Calculate W C one band of C at a time
+    product = np.zeros(in_bands.shape[:-2] + (n_new, width))
+
+    for q in range(-p, p+1):
+        shifted = np.zeros_like(padded)
+        shifted[:, max(-q, 0):width-max(q, 0)] = \
+            padded[:, max(q, 0):width-max(-q, 0)]
+
+        lower = np.minimum(cols, cols + q)
+        valid = (lower >= 0) & (np.maximum(cols, cols + q) < n_old)
+        band = in_bands[..., abs(q), :][..., np.clip(lower, 0, n_old-1)]
+        product += np.where(valid, band, 0.)*shifted
+
+    # New bins i and j > i are correlated if row i of W C overlaps row
+    # j of W, i.e. if start[j] <= stop[i] + p
+    n_bands = 1
+    in_rows = np.flatnonzero(inside)
+
+    if in_rows.shape[0]:
+        stop = start[in_rows] + counts[in_rows] - 1
+        last = np.searchsorted(start[in_rows], stop + p, side="right") - 1
+        n_bands = int(np.max(in_rows[last] - in_rows)) + 1
+
+    new_bands = np.zeros(in_bands.shape[:-2] + (n_bands, n_new))
+
+    for d in range(min(n_bands, n_new)):
+        # Column m of row i is column m + first[i] - first[i+d] of row i+d
+        m = np.arange(width) + (first[:n_new-d] - first[d:])[:, np.newaxis]
+        valid = (m >= 0) & (m < width)
+        other = padded[np.arange(d, n_new)[:, np.newaxis],
+                       np.clip(m, 0, width-1)]
+
+        new_bands[..., d, :n_new-d] = np.sum(
+            product[..., :n_new-d, :]*np.where(valid, other, 0.), axis=-1)
+
+    new_bands[..., 0, ~inside] = np.nan if fill is None else fill**2
+
+    return new_bands
+
+
+def _covariance_bands(spec_errs=None, spec_covar=None):
+    """ Return the covariance of the old bins in lower banded form,
+    from either independent uncertainties or a banded covariance. """
+
+    if spec_covar is not None:
+        return np.asarray(spec_covar, dtype=float)
+
+    if spec_errs is None:
+        raise ValueError("Either spec_errs or spec_covar must be specified "
+                         "to calculate a covariance.")
+
+    return (np.asarray(spec_errs, dtype=float)**2)[..., np.newaxis, :]
+
+
+def _matvec(operator, values, weights):
+    """ Apply the CSR matrix of a plan (or its transpose), with the given
+    weights, along the last axis of values. """
+    out = np.zeros(values.shape[:-1] + (operator.shape[0],))
+
+    if operator.rows.shape[0]:
+        products = values[..., operator.indices]*weights
+        out[..., operator.rows] = np.add.reduceat(
+            products, operator.row_starts, axis=-1)
+
+    return out
+
+
+class ResamplingPlan(object):
+    """
+    Precomputed resampling operator for a fixed pair of wavelength
+    grids. The overlap weights between the new and old bins are
+    calculated once and stored as a compressed sparse row (CSR)
+    matrix, so that resampling many spectra onto the same grid only
+    requires a sparse matrix product for each call.
+
+    Parameters
+    ----------
+
+    new_wavs : numpy.ndarray
+        Array containing the new wavelength sampling desired for the
+        spectrum or spectra.
+
+    spec_wavs : numpy.ndarray
+        1D array containing the current wavelength sampling of the
+        spectrum or spectra.
+
+    fill : float (optional)
+        Where new_wavs extends outside the wavelength range in spec_wavs
+        this value will be used as a filler in new_fluxes and new_errs.
+
+    verbose : bool (optional)
+        Setting verbose to False will suppress the default warning about
+        new_wavs extending outside spec_wavs and "fill" being used.
+
+    lsf_sigma : float or numpy.ndarray (optional)
+        Standard deviation of a Gaussian line-spread function, either a
+        single value or one for each entry in new_wavs, in the same
+        units as new_wavs. If given (or resolution is) the plan
+        convolves the spectra with the line-spread function and
+        resamples them in one step.
+
+    resolution : float or numpy.ndarray (optional)
+        Resolving power R = wavelength/FWHM of the line-spread function,
+        used in place of lsf_sigma.
+
+    Attributes
+    ----------
+
+    indptr, indices, weights : numpy.ndarray
+        CSR representation of the (len(new_wavs), len(spec_wavs))
+        weight matrix. The weights in each row sum to one.
+
+    inside : numpy.ndarray
+        Boolean array, True for new bins which lie within spec_wavs.
+
+    T : AdjointPlan
+        The transpose of the weight matrix, see AdjointPlan.
+    """
+
+    def __init__(self, new_wavs, spec_wavs, fill=None, verbose=True,
+                 lsf_sigma=None, resolution=None):
+
+        self.new_wavs = np.asarray(new_wavs)
+        self.spec_wavs = np.asarray(spec_wavs)
+        self.fill = fill
+        self.shape = (self.new_wavs.shape[0], self.spec_wavs.shape[0])
+
+        old_edges, old_widths = make_bins(self.spec_wavs)
+        new_edges, new_widths = make_bins(self.new_wavs)
+
+        overlaps = find_overlaps(old_edges, old_widths, new_edges)
+        inside = overlaps[4]
+
+        if verbose and (not inside[0] or not inside[-1]):
+            _warn_fill()
+
+        if lsf_sigma is None and resolution is None:
+            indptr, indices, weights, counts = _csr_weights(old_widths,
+                                                            overlaps)
+            self._start = overlaps[0]
+
+        else:
+            sigma = lsf_sigmas(self.new_wavs, lsf_sigma, resolution)
+            indptr, indices, weights = lsf_weights(old_edges, new_edges,
+                                                   sigma, inside)
+            self._start = np.zeros(self.shape[0], dtype=np.intp)
+            self._start[inside] = indices[indptr[:-1][inside]]
+
+        self.rows = np.flatnonzero(inside)
+        self.row_starts = indptr[:-1][inside]
+        self._adjoint = None
+
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.inside = inside
+
+    def engine(self, old_edges, old_widths, new_edges, old_fluxes,
+               old_errs=None, fill=None, overlaps=None, dtype=None, out=None,
+               out_errs=None):
+        """ Apply the plan with the signature of a resampling engine (see
+        spectres.backends), ignoring the bins and overlaps passed to it,
+        so that spectres can use the plan in place of a backend. """
+
+        fill = np.nan if fill is None else fill
+        dtype = np.dtype(float if dtype is None else dtype)
+
+        new_fluxes = _matvec(self, old_fluxes, self.weights)
+        new_fluxes = _store(np.where(self.inside, new_fluxes, fill), out,
+                            dtype)
+
+        if old_errs is None:
+            return new_fluxes, None, self.inside
+
+        new_errs = np.sqrt(_matvec(self, old_errs**2, self.weights**2))
+        new_errs = _store(np.where(self.inside, new_errs, fill), out_errs,
+                          dtype)
+
+        return new_fluxes, new_errs, self.inside
+
+    @property
+    def T(self):
+        """ The transpose (adjoint) of the plan, an AdjointPlan which
+        maps arrays on the new wavelength grid back onto spec_wavs. """
+        if self._adjoint is None:
+            self._adjoint = AdjointPlan(self)
+
+        return self._adjoint
+
+    def jacobian(self):
+        """
+        Return the Jacobian of new_fluxes with respect to spec_fluxes,
+        i.e. the (len(new_wavs), len(spec_wavs)) weight matrix, as a
+        scipy.sparse.csr_matrix. Rows for new bins outside spec_wavs
+        are zero. If SciPy is not installed the same matrix is returned
+        as a dense numpy.ndarray instead.
+        """
+        try:
+            from scipy.sparse import csr_matrix
+
+        except ImportError:
+            rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+            matrix = np.zeros(self.shape)
+            matrix[rows, self.indices] = self.weights
+            return matrix
+
+        return csr_matrix((self.weights, self.indices, self.indptr),
+                          shape=self.shape)
+
+    def __call__(self, spec_fluxes, spec_errs=None):
+        """
+        Resample spectra (and optionally associated uncertainties)
+        onto the new wavelength basis of the plan.
+
+        Parameters
+        ----------
+
+        spec_fluxes : numpy.ndarray
+            Array containing spectral fluxes at the wavelengths
+            specified in spec_wavs, last dimension must correspond to
+            the shape of spec_wavs. Extra dimensions before this may be
+            used to include multiple spectra.
+
+        spec_errs : numpy.ndarray (optional)
+            Array of the same shape as spec_fluxes containing
+            uncertainties associated with each spectral flux value.
+
+        Returns
+        -------
+
+        new_fluxes : numpy.ndarray
+            Array of resampled flux values, as returned by spectres.
+
+        new_errs : numpy.ndarray
+            Array of uncertainties associated with fluxes in new_fluxes.
+            Only returned if spec_errs was specified.
+        """
+
+        spec_fluxes = np.asarray(spec_fluxes)
+
+        if spec_fluxes.shape[-1] != self.shape[1]:
+            raise ValueError("The last dimension of spec_fluxes must be the "
+                             "same length as spec_wavs.")
+
+        new_fluxes = _matvec(self, spec_fluxes, self.weights)
+        new_fluxes[..., ~self.inside] = self.fill
+
+        if spec_errs is None:
+            return new_fluxes
+
+        spec_errs = np.asarray(spec_errs)
+
+        if spec_errs.shape != spec_fluxes.shape:
+            raise ValueError("If specified, spec_errs must be the same shape "
+                             "as spec_fluxes.")
+
+        new_errs = np.sqrt(_matvec(self, spec_errs**2, self.weights**2))
+        new_errs[..., ~self.inside] = self.fill
+
+        return new_fluxes, new_errs
+
+    def covariance(self, spec_errs=None, spec_covar=None):
+        """
+        Calculate the covariance matrix of the resampled fluxes. New
+        bins which share an old bin are correlated, so the matrix is
+        banded rather than diagonal, and is returned in lower banded
+        form: new_covar[..., d, i] is the covariance of new bins i+d
+        and i, as used by scipy.linalg.solveh_banded.
+
+        Parameters
+        ----------
+
+        spec_errs : numpy.ndarray (optional)
+            Array containing independent uncertainties associated with
+            each spectral flux value, last dimension must correspond to
+            the shape of spec_wavs.
+
+        spec_covar : numpy.ndarray (optional)
+            Covariance matrix of the spectral fluxes in lower banded
+            form, with shape (..., n_bands, len(spec_wavs)). Used in
+            place of spec_errs for correlated uncertainties.
+
+        Returns
+        -------
+
+        new_covar : numpy.ndarray
+            Covariance of the new fluxes in lower banded form, with
+            shape (..., n_bands, len(new_wavs)).
+        """
+
+        in_bands = _covariance_bands(spec_errs, spec_covar)
+
+        if in_bands.shape[-1] != self.shape[1]:
+            raise ValueError("The last dimension of spec_errs or spec_covar "
+                             "must be the same length as spec_wavs.")
+
+        return _banded_covariance(self.indptr, self.weights, self._start,
+                                  self.inside, in_bands, fill=self.fill)
+
+
+class AdjointPlan(object):
+    """
+    Transpose (adjoint) of a ResamplingPlan, obtained from plan.T.
+    Resampling is linear in the fluxes, new_fluxes = W spec_fluxes for
+    the weight matrix W, so calling the adjoint with the derivative of
+    a loss with respect to new_fluxes returns its derivative with
+    respect to spec_fluxes, W^T d(loss)/d(new_fluxes), in one sparse
+    product rather than one resampling per old bin.
+
+    Parameters
+    ----------
+
+    plan : spectres.ResamplingPlan
+        The plan to transpose.
+    """
+
+    def __init__(self, plan):
+
+        self.T = plan
+        self.shape = plan.shape[::-1]
+
+        counts = np.diff(plan.indptr)
+        rows = np.repeat(np.arange(plan.shape[0]), counts)
+
+        # Sort the nonzero weights by old bin, the CSC form of W, which
+        # is the CSR form of its transpose
+        order = np.argsort(plan.indices, kind="stable")
+        self.indices = rows[order]
+        self.weights = plan.weights[order]
+
+        old_bins = plan.indices[order]
+        new_column = np.ones(old_bins.shape[0], dtype=bool)
+        new_column[1:] = old_bins[1:] != old_bins[:-1]
+
+        self.row_starts = np.flatnonzero(new_column)
+        self.rows = old_bins[self.row_starts]
+
+    def __call__(self, new_values):
+        """
+        Map values on the new wavelength grid (e.g. residuals or the
+        gradient of a loss with respect to new_fluxes) back onto the
+        original grid.
+
+        Parameters
+        ----------
+
+        new_values : numpy.ndarray
+            Array whose last dimension corresponds to the shape of
+            new_wavs. Extra dimensions before this may be used to
+            include multiple spectra.
+
+        Returns
+        -------
+
+        spec_values : numpy.ndarray
+            W^T new_values, last dimension is the same length as
+            spec_wavs, other dimensions are the same as new_values.
+        """
+
+        new_values = np.asarray(new_values)
+
+        if new_values.shape[-1] != self.shape[1]:
+            raise ValueError("The last dimension of new_values must be the "
+                             "same length as new_wavs.")
+
+        return _matvec(self, new_values, self.weights)
+
+
+def spectres_adjoint(new_wavs, spec_wavs, new_values):
+    """
+    Function applying the transpose of the spectres resampling
+    operator, mapping values on new_wavs (e.g. the gradient of a loss
+    with respect to the resampled fluxes) back onto spec_wavs. As the
+    resampled fluxes are linear in spec_fluxes, this gives the gradient
+    of the loss with respect to spec_fluxes in a single call. New bins
+    outside spec_wavs, which are filled, do not contribute.
+
+    Parameters
+    ----------
+
+    new_wavs : numpy.ndarray
+        1D array containing the new wavelength sampling.
+
+    spec_wavs : numpy.ndarray
+        1D array containing the original wavelength sampling.
+
+    new_values : numpy.ndarray
+        Array whose last dimension corresponds to the shape of new_wavs.
+        Extra dimensions before this may be used to include multiple
+        spectra.
+
+    Returns
+    -------
+
+    spec_values : numpy.ndarray
+        Array of values on spec_wavs, last dimension is the same length
+        as spec_wavs, other dimensions are the same as new_values.
+    """
+
+    plan = ResamplingPlan(new_wavs, spec_wavs, verbose=False)
+
+    return plan.T(new_values)
@@ -1,25 +1,560 @@
 from __future__ import print_function, division, absolute_import
+import time
 import warnings
 
 import numpy as np
 
+from .backends import (register_backend, register_lazy_backend,
+                       get_backend, resolve_backend)
+from .cache import grid_cache
+from .profiling import profiling, report, start_memory, peak_memory
 
-def make_bins(wavs):
+
+def make_bins(wavs, edges=None, widths=None):
     """ Given a series of wavelength points, find the edges and widths
-    of corresponding wavelength bins. """
-    edges = np.zeros(wavs.shape[0]+1)
-    widths = np.zeros(wavs.shape[0])
-    edges[0] = wavs[0] - (wavs[1] - wavs[0])/2
-    widths[-1] = (wavs[-1] - wavs[-2])
-    edges[-1] = wavs[-1] + (wavs[-1] - wavs[-2])/2
-    edges[1:-1] = (wavs[1:] + wavs[:-1])/2
-    widths[:-1] = edges[1:-1] - edges[:-2]
+    of corresponding wavelength bins. If wavs has more than one
+    dimension the bins are found along its last axis. Existing arrays
+    can be passed as edges and widths to be filled in place. """
+    if edges is None:
+        edges = np.zeros(wavs.shape[:-1] + (wavs.shape[-1]+1,))
+
+    if widths is None:
+        widths = np.zeros(wavs.shape)
+
+    edges[..., 0] = wavs[..., 0] - (wavs[..., 1] - wavs[..., 0])/2
+    widths[..., -1] = (wavs[..., -1] - wavs[..., -2])
+    edges[..., -1] = wavs[..., -1] + (wavs[..., -1] - wavs[..., -2])/2
+    np.add(wavs[..., 1:], wavs[..., :-1], out=edges[..., 1:-1])
+    edges[..., 1:-1] /= 2
+    np.subtract(edges[..., 1:-1], edges[..., :-2], out=widths[..., :-1])
 
     return edges, widths
 
 
+def _warn_fill():
+    warnings.warn(
+        "Spectres: new_wavs contains values outside the range "
+        "in spec_wavs, new_fluxes and new_errs will be filled "
+        "with the value set in the 'fill' keyword argument "
+        "(by default 0).",
+        category=RuntimeWarning,
+    )
+
+
+def _take(values, indices):
+    """ Take values at indices along the last axis, broadcasting any
+    leading dimensions of values and indices against each other. """
+    if values.ndim == 1:
+        return values[indices]
+
+    ndim = max(values.ndim, indices.ndim)
+    values = values.reshape((1,)*(ndim - values.ndim) + values.shape)
+    indices = indices.reshape((1,)*(ndim - indices.ndim) + indices.shape)
+
+    return np.take_along_axis(values, indices, axis=-1)
+
+
+def _searchsorted(sorted_values, values, side="left"):
+    """ Equivalent of np.searchsorted along the last axis of
+    sorted_values, which may have leading dimensions broadcasting with
+    those of values. Multi-dimensional sorted_values are handled with a
+    binary search run on every row at once. """
+    if sorted_values.ndim == 1:
+        return np.searchsorted(sorted_values, values, side=side)
+
+    n = sorted_values.shape[-1]
+    shape = np.broadcast_shapes(sorted_values.shape[:-1],
+                                values.shape[:-1]) + values.shape[-1:]
+
+    low = np.zeros(shape, dtype=np.intp)
+    high = np.full(shape, n, dtype=np.intp)
+
+    for i in range(int(np.ceil(np.log2(n+1)))):
+        mid = (low + high)//2
+        pivots = _take(sorted_values, np.minimum(mid, n-1))
+
+        if side == "left":
+            right = pivots < values
+        else:
+            right = pivots <= values
+
+        right &= low < high
+        low = np.where(right, mid+1, low)
+        high = np.where(right, high, mid)
+
+    return low
+
+
+def grid_type(wavs):
+    """ Return "linear" if wavs are uniformly spaced, "log" if they are
+    uniformly spaced in log(wavelength) and None otherwise. """
+    if wavs.ndim != 1 or wavs.shape[0] < 3:
+        return None
+
+    diffs = np.diff(wavs)
+    if np.allclose(diffs, diffs[0], rtol=1e-8, atol=0.):
+        return "linear"
+
+    if wavs[0] > 0:
+        ratios = wavs[1:]/wavs[:-1]
+        if np.allclose(ratios, ratios[0], rtol=1e-12, atol=0.):
+            return "log"
+
+    return None
+
+
+def _grid_searchsorted(old_edges, values, side, grid):
+    """ Equivalent of np.searchsorted(old_edges[1:], values, side) for
+    1D edges made from a linear or log-uniform grid, where the index of
+    each value can be calculated directly. Any values for which the
+    calculated index is wrong (e.g. from rounding where a value falls
+    on an edge, or if the grid is not really uniform) are looked up
+    with np.searchsorted instead. """
+    n = old_edges.shape[0]-1
+
+    # Bin edges made from a uniform grid are uniform, those made from a
+    # log-uniform grid are log-uniform apart from the outermost edges.
+    if grid == "linear":
+        step = (old_edges[-1] - old_edges[0])/n
+        guess = np.floor((values - old_edges[0])/step)
+
+    elif grid == "log":
+        ratio = old_edges[2]/old_edges[1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            guess = np.floor(np.log(values/old_edges[1])/np.log(ratio)) + 1
+
+    else:
+        raise ValueError("grid must be one of None, 'auto', 'linear' or "
+                         "'log'.")
+
+    index = np.clip(np.nan_to_num(guess), 0, n).astype(np.intp)
+
+    below = old_edges[index]
+    above = old_edges[np.minimum(index+1, n)]
+
+    if side == "right":
+        correct = ((index == 0) | (below <= values))
+        correct &= (index == n) | (above > values)
+
+    else:
+        correct = ((index == 0) | (below < values))
+        correct &= (index == n) | (above >= values)
+
+    if not np.all(correct):
+        index[~correct] = np.searchsorted(old_edges[1:], values[~correct],
+                                          side=side)
+
+    return index
+
+
+def find_overlaps(old_edges, old_widths, new_edges, grid=None):
+    """ For each new bin find the first (start) and last (stop) old
+    bins it partially covers, the widths of the start and stop bins
+    which fall inside the new bin and whether the new bin lies within
+    the range covered by the old bins. Leading dimensions of old_edges
+    and new_edges are broadcast against each other. If the old bins
+    were made from a "linear" or "log" uniform grid this can be passed
+    as grid to calculate the overlaps directly rather than searching
+    for them. """
+
+    new_lo = new_edges[..., :-1]
+    new_hi = new_edges[..., 1:]
+    n_old = old_widths.shape[-1]
+
+    inside = ((new_lo >= old_edges[..., :1])
+              & (new_hi <= old_edges[..., -1:]))
+
+    # Equivalent to the incremental while-scans in spectres.
+    if grid is not None and old_edges.ndim == 1:
+        start = _grid_searchsorted(old_edges, new_lo, "right", grid)
+        stop = _grid_searchsorted(old_edges, new_hi, "left", grid)
+
+    else:
+        start = _searchsorted(old_edges[..., 1:], new_lo, side="right")
+        stop = _searchsorted(old_edges[..., 1:], new_hi, side="left")
+    start = np.minimum(start, n_old-1)
+    stop = np.minimum(stop, n_old-1)
+
+    start_factor = ((_take(old_edges, start+1) - new_lo)
+                    / (_take(old_edges, start+1) - _take(old_edges, start)))
+
+    end_factor = ((new_hi - _take(old_edges, stop))
+                  / (_take(old_edges, stop+1) - _take(old_edges, stop)))
+
+    start_widths = _take(old_widths, start)*start_factor
+    stop_widths = _take(old_widths, stop)*end_factor
+
+    return start, stop, start_widths, stop_widths, inside
+
+
+def _edge_overlaps(old_edges, old_widths, new_edges):
+    """ Equivalent of find_overlaps for 1D old_edges and new_edges with
+    any leading dimensions (e.g. one row for each of many redshifts),
+    which locates each new edge once, as a fractional index into
+    old_edges, rather than searching for both ends of every new bin. """
+    n_old = old_widths.shape[0]
+    position = np.interp(new_edges, old_edges,
+                         np.arange(n_old + 1, dtype=float))
+
+    start = np.minimum(np.floor(position[..., :-1]), n_old-1).astype(np.intp)
+    stop = np.clip(np.ceil(position[..., 1:]) - 1, 0, n_old-1).astype(np.intp)
+
+    start_widths = old_widths[start]*(1. - (position[..., :-1] - start))
+    stop_widths = old_widths[stop]*(position[..., 1:] - stop)
+
+    inside = ((new_edges[..., :-1] >= old_edges[0])
+              & (new_edges[..., 1:] <= old_edges[-1]))
+
+    return start, stop, start_widths, stop_widths, inside
+
+
+def _output_dtype(fluxes, dtype=None, preserve_dtype=False):
+    """ Return the dtype of the arrays spectres will return. """
+    if dtype is not None:
+        return np.dtype(dtype)
+
+    if preserve_dtype and np.issubdtype(fluxes.dtype, np.floating):
+        return fluxes.dtype
+
+    return np.dtype(float)
+
+
+def _store(values, out, dtype):
+    """ Copy values into out if it was given, otherwise convert them to
+    dtype. """
+    if out is None:
+        return values.astype(dtype, copy=False)
+
+    if out.shape != values.shape:
+        raise ValueError("Output array has shape %s, expected %s."
+                         % (out.shape, values.shape))
+
+    out[...] = values
+
+    return out
+
+
+def _bin_sums(values, first, last):
+    """ Sum values along their last axis from index first up to (but not
+    including) last for each new bin, in float64. Leading dimensions of
+    values and the indices are broadcast against each other without
+    copying values. Each sum only includes the values it covers, so a
+    NaN or inf only reaches the new bins which overlap it. """
+
+    n = values.shape[-1]
+    shape = np.broadcast_shapes(values.shape[:-1], first.shape[:-1])
+
+    # Offsets of each row of values in the flattened array, broadcast
+    # along any dimensions over which values is repeated
+    offsets = np.arange(values.size//n)*n
+    offsets = offsets.reshape(values.shape[:-1] + (1,))
+
+    first = np.broadcast_to(first + offsets, shape + first.shape[-1:])
+    last = np.broadcast_to(last + offsets, shape + last.shape[-1:])
+    empty = last <= first
+
+    # np.add.reduceat sums between consecutive indices, so the first and
+    # last indices of each bin are interleaved and every other sum kept
+    indices = np.empty(first.shape[:-1] + (2*first.shape[-1],), dtype=np.intp)
+    indices[..., ::2] = np.where(empty, last, first)
+    indices[..., 1::2] = last
+
+    sums = np.add.reduceat(values.ravel(), indices.ravel(), dtype=float)
+    sums = sums[::2].reshape(first.shape)
+
+    return np.where(empty, 0., sums)
+
+
+def _prefix_sums(values):
+    """ Prefix sums of the finite values along the last axis of values,
+    in float64, with prefix counts of the NaN, +inf and -inf values (or
+    None if there are none), for _prefix_diff. """
+    finite = np.isfinite(values)
+    sums = np.zeros(values.shape[:-1] + (values.shape[-1]+1,))
+    np.cumsum(np.where(finite, values, 0.), axis=-1, out=sums[..., 1:])
+
+    if np.all(finite):
+        return sums, None
+
+    counts = np.zeros((3,) + sums.shape, dtype=np.intp)
+
+    for count, bad in zip(counts, (np.isnan(values), values == np.inf,
+                                   values == -np.inf)):
+        np.cumsum(bad, axis=-1, out=count[..., 1:])
+
+    return sums, counts
+
+
+def _prefix_diff(prefix, first, last):
+    """ Sum of values from index first up to (but not including) last
+    along their last axis, from the output of _prefix_sums. As when the
+    values are added up directly, a NaN or inf only reaches the sums
+    which include it. """
+    sums, counts = prefix
+    diff = _take(sums, last) - _take(sums, first)
+
+    if counts is None:
+        return diff
+
+    n_nan, n_pos, n_neg = (_take(count, last) - _take(count, first)
+                           for count in counts)
+
+    diff = np.where(n_pos > 0, np.inf, diff)
+    diff = np.where(n_neg > 0, -np.inf, diff)
+
+    return np.where((n_nan > 0) | ((n_pos > 0) & (n_neg > 0)), np.nan, diff)
+
+
+def _resampling_prefix(old_widths, old_fluxes, old_errs=None):
+    """ Prefix sums of flux*width and (err*width)**2, which can be
+    passed to _numpy_resample as _prefix. """
+    old_widths = old_widths.astype(float, copy=False)
+
+    if old_errs is None:
+        return _prefix_sums(old_widths*old_fluxes), None
+
+    return (_prefix_sums(old_widths*old_fluxes),
+            _prefix_sums((old_widths*old_errs)**2))
+
+
+def _numpy_resample(old_edges, old_widths, new_edges, old_fluxes,
+                    old_errs=None, fill=None, overlaps=None, dtype=None,
+                    out=None, out_errs=None, _prefix=None):
+    """ Resample old_fluxes (and old_errs) along their last axis by
+    summing flux*width and (err*width)**2 over the old bins lying fully
+    inside each new bin, with the partial old bins at either end of
+    each new bin added separately. Leading dimensions of the edges and
+    fluxes are broadcast against each other. The output of
+    find_overlaps can be passed as overlaps if it has already been
+    calculated. Returns the new fluxes, the new errors (or None) and
+    the inside mask.
+
+    If the same fluxes are resampled onto many sets of new bins, the
+    output of _resampling_prefix can be passed as _prefix, so that the
+    sums for each new bin are differences of prefix sums calculated
+    once rather than being summed over the old bins each time. """
+
+    if overlaps is None:
+        overlaps = find_overlaps(old_edges, old_widths, new_edges)
+
+    start, stop, start_widths, stop_widths, inside = overlaps
+
+    fill = np.nan if fill is None else fill
+    dtype = np.dtype(float if dtype is None else dtype)
+
+    # The widths are kept in float64 so that flux*width and
+    # (err*width)**2 are formed in float64 (squaring float32 errors of
+    # order 1e-20 would underflow), the results being cast to dtype only
+    # when they are stored
+    old_widths = old_widths.astype(float, copy=False)
+
+    # New bins which lie fully inside a single old bin take its value,
+    # otherwise sum over the old bins, the interior ones being those
+    # from start+1 up to stop
+    single = stop == start
+    interior = np.minimum(start+1, stop)
+    total_widths = (_take(old_edges, stop) - _take(old_edges, start+1)
+                    + start_widths + stop_widths)
+    total_widths = np.where(inside & ~single, total_widths, 1.)
+
+    if _prefix is None:
+        interior_sums = _bin_sums(old_widths*old_fluxes, interior, stop)
+
+    else:
+        interior_sums = _prefix_diff(_prefix[0], interior, stop)
+
+    start_fluxes = _take(old_fluxes, start)
+    new_fluxes = (interior_sums + start_widths*start_fluxes
+                  + stop_widths*_take(old_fluxes, stop))/total_widths
+
+    new_fluxes = np.where(single, start_fluxes, new_fluxes)
+
+    # Add filler values where new_wavs extends outside of spec_wavs
+    new_fluxes = _store(np.where(inside, new_fluxes, fill), out, dtype)
+
+    if old_errs is None:
+        return new_fluxes, None, inside
+
+    if _prefix is None:
+        interior_sums = _bin_sums((old_widths*old_errs)**2, interior, stop)
+
+    else:
+        interior_sums = _prefix_diff(_prefix[1], interior, stop)
+
+    start_errs = _take(old_errs, start)
+    err_sq = (interior_sums + (start_widths*start_errs)**2
+              + (stop_widths*_take(old_errs, stop))**2)
+
+    new_errs = np.sqrt(err_sq)/total_widths
+    new_errs = np.where(single, start_errs, new_errs)
+    new_errs = _store(np.where(inside, new_errs, fill), out_errs, dtype)
+
+    return new_fluxes, new_errs, inside
+
+
+# When axis is not the last, _row_resample is used if there are at least
+# this many old values per new bin to outweigh its per-bin overhead,
+# otherwise the backend resamples the strided views
+_min_values_per_bin = 2000
+
+
+def _row_output(out, values, shape, dtype):
+    """ Return out, or a new array laid out in memory like values,
+    viewed with the wavelength (last) axis first. """
+    if out is None:
+        out = np.empty_like(values, dtype=dtype, shape=shape)
+
+    elif out.shape != shape:
+        raise ValueError("Output array has shape %s, expected %s."
+                         % (out.shape, shape))
+
+    return np.moveaxis(out, -1, 0)
+
+
+def _row_resample(old_edges, old_widths, new_edges, old_fluxes,
+                  old_errs=None, fill=None, overlaps=None, dtype=None,
+                  out=None, out_errs=None):
+    """ Resample old_fluxes (and old_errs) along their last axis, for
+    arrays stored with that axis first in memory (wavelength-major, as
+    given by np.moveaxis on a C-contiguous array). Each new bin is a
+    weighted sum of a contiguous block of rows, so no transposed copy
+    or spectrum-sized temporaries are made, and the new fluxes are laid
+    out in memory in the same way. Only 1D edges are supported. """
+
+    if overlaps is None:
+        overlaps = find_overlaps(old_edges, old_widths, new_edges)
+
+    start, stop, start_widths, stop_widths, inside = overlaps
+
+    fill = np.nan if fill is None else fill
+    dtype = np.dtype(float if dtype is None else dtype)
+    shape = old_fluxes.shape[:-1] + start.shape
+
+    old_rows = np.moveaxis(old_fluxes, -1, 0)
+    new_rows = _row_output(out, old_fluxes, shape, dtype)
+    new_rows[~inside] = fill
+
+    if old_errs is not None:
+        old_err_rows = np.moveaxis(old_errs, -1, 0)
+        new_err_rows = _row_output(out_errs, old_errs, shape, dtype)
+        new_err_rows[~inside] = fill
+
+    for i in np.flatnonzero(inside):
+        first, last = start[i], stop[i] + 1
+
+        # New bins which lie fully inside a single old bin take its value
+        if last - first == 1:
+            new_rows[i] = old_rows[first]
+
+            if old_errs is not None:
+                new_err_rows[i] = old_err_rows[first]
+
+            continue
+
+        weights = old_widths[first:last].astype(float)
+        weights[0], weights[-1] = start_widths[i], stop_widths[i]
+        total = weights.sum()
+
+        new_rows[i] = np.tensordot(weights, old_rows[first:last], 1)/total
+
+        if old_errs is not None:
+            err_sq = np.tensordot(weights**2, np.square(
+                old_err_rows[first:last], dtype=float), 1)
+            new_err_rows[i] = np.sqrt(err_sq)/total
+
+    new_fluxes = np.moveaxis(new_rows, 0, -1)
+
+    if old_errs is None:
+        return new_fluxes, None, inside
+
+    return new_fluxes, np.moveaxis(new_err_rows, 0, -1), inside
+
+
+register_backend("numpy", _numpy_resample)
+
+# Compiled backends are preferred when backend="auto", but are only
+# imported when they are first used. Each is put ahead of those already
+# registered, so the ahead-of-time extension, which is only there if it
+# has been built, comes before Numba
+register_lazy_backend("numba", "spectres.spectral_resampling_numba",
+                      "numba", priority=True, nogil=True)
+register_lazy_backend("aot", "spectres.spectral_resampling_aot",
+                      "spectres._spectres_aot", priority=True)
+
+
+def _is_lazy(array):
+    """ Return True for chunked lazy arrays, such as dask arrays. """
+    return (type(array).__module__.split(".")[0] == "dask"
+            and hasattr(array, "map_blocks"))
+
+
+def _align_wavs(wavs, fluxes, name):
+    """ Reshape a 2D wavelength array so that its rows broadcast along
+    the first axis of fluxes. """
+    if wavs.ndim == 1:
+        return wavs
+
+    if (wavs.ndim != 2 or fluxes.ndim < 2
+            or wavs.shape[0] != fluxes.shape[0]):
+        raise ValueError("If %s is 2D its first dimension must be the same "
+                         "length as the first dimension of spec_fluxes."
+                         % name)
+
+    if name == "spec_wavs" and wavs.shape[1] != fluxes.shape[-1]:
+        raise ValueError("The last dimension of spec_wavs must be the same "
+                         "length as the last dimension of spec_fluxes.")
+
+    return wavs.reshape(wavs.shape[:1] + (1,)*(fluxes.ndim-2) + wavs.shape[1:])
+
+
+def _buffer(array):
+    """ Return the array which owns the memory of a view. """
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+
+    return array
+
+
+def _allocated_bytes(arrays, exclude=()):
+    """ Total size of the memory behind arrays, counting each buffer once
+    so that views (e.g. from np.broadcast_to) are not counted as new
+    allocations, and leaving out the buffers of the arrays in exclude. """
+    excluded = set(id(_buffer(array)) for array in exclude
+                   if array is not None)
+    buffers = dict((id(_buffer(array)), _buffer(array)) for array in arrays)
+
+    return sum(array.nbytes for key, array in buffers.items()
+               if key not in excluded)
+
+
+def _report_call(stats, memory, times, allocated, outputs, per_bin, inside,
+                 new_fluxes, n_old, backend):
+    """ Pass the record of a call to spectres to the stats callback and
+    any recording profiles, see spectres.profile. """
+    n_inside = np.count_nonzero(np.broadcast_to(inside, new_fluxes.shape))
+
+    record = {"times": times,
+              "bytes": _allocated_bytes(allocated, exclude=outputs),
+              "n_filled": int(new_fluxes.size - n_inside),
+              "pixels_per_bin": float(np.mean(per_bin[inside])
+                                      if np.any(inside) else 0.),
+              "backend": backend,
+              "n_spectra": new_fluxes.size//new_fluxes.shape[-1],
+              "n_old": n_old,
+              "n_new": new_fluxes.shape[-1]}
+
+    if memory is not None:
+        record["peak_bytes"] = peak_memory(memory)
+
+    report(record, stats)
+
+
 def spectres(new_wavs, spec_wavs, spec_fluxes, spec_errs=None, fill=None,
-             verbose=True):
+             verbose=True, backend="auto", grid=None, n_jobs=None,
+             dtype=None, preserve_dtype=False, out=None, out_errs=None,
+             workspace=None, spec_covar=None, return_covariance=False,
+             mask=None, ignore_nan=False, return_coverage=False,
+             stats=None, lsf_sigma=None, resolution=None, axis=-1):
 
     """
     Function for resampling spectra (and optionally associated
@@ -28,6 +563,498 @@ def spectres(new_wavs, spec_wavs, spec_fluxes, spec_errs=None, fill=None,
     Parameters
     ----------
 
+    new_wavs : numpy.ndarray
+        Array containing the new wavelength sampling desired for the
+        spectrum or spectra. May be 2D, in which case each row gives
+        the new sampling for the corresponding entry along the first
+        axis of spec_fluxes.
+
+    spec_wavs : numpy.ndarray
+        1D array containing the current wavelength sampling of the
+        spectrum or spectra. May be 2D, in which case each row gives
+        the sampling of the corresponding entry along the first axis
+        of spec_fluxes.
+
+    spec_fluxes : numpy.ndarray
+        Array containing spectral fluxes at the wavelengths specified in
+        spec_wavs, last dimension must correspond to the shape of
+        spec_wavs. Extra dimensions before this may be used to include
+        multiple spectra.
+
+    spec_errs : numpy.ndarray (optional)
+        Array of the same shape as spec_fluxes containing uncertainties
+        associated with each spectral flux value.
+
+    fill : float (optional)
+        Where new_wavs extends outside the wavelength range in spec_wavs
+        this value will be used as a filler in new_fluxes and new_errs.
+
+    verbose : bool (optional)
+        Setting verbose to False will suppress the default warning about
+        new_wavs extending outside spec_wavs and "fill" being used.
+
+    backend : str (optional)
+        Name of the resampling engine to use, see available_backends.
+        The default, "auto", uses the extension built by python -m
+        spectres.compile --aot if there is one, then the Numba compiled
+        engine if Numba is installed and the NumPy engine otherwise.
+
+    grid : str (optional)
+        Either "linear" or "log" if spec_wavs is uniformly spaced in
+        wavelength or log(wavelength), in which case the old bins which
+        overlap each new bin are calculated directly rather than being
+        searched for. Set to "auto" to detect whether spec_wavs is
+        uniform, which costs one pass over spec_wavs.
+
+    n_jobs : int (optional)
+        If specified, split the spectra between this many workers (-1
+        for one per CPU) using a ParallelResampler. Only supported for
+        1D new_wavs and spec_wavs.
+
+    dtype : numpy.dtype (optional)
+        Data type of new_fluxes and new_errs, float64 by default.
+
+    preserve_dtype : bool (optional)
+        If True (and dtype is not set) new_fluxes and new_errs have the
+        same data type as spec_fluxes, e.g. float32 spectra are
+        resampled by a float32 kernel into float32 outputs.
+
+    out : numpy.ndarray (optional)
+        Existing array into which new_fluxes are written, which is then
+        returned. Its data type is used if dtype is not set.
+
+    out_errs : numpy.ndarray (optional)
+        Existing array into which new_errs are written.
+
+    workspace : spectres.Workspace (optional)
+        Preallocated arrays for the bin edges, widths and overlaps,
+        reused on each call rather than being allocated again. With the
+        Numba backend, passing out, out_errs (if spec_errs is given) and
+        a workspace means no arrays are allocated by each call.
+
+    spec_covar : numpy.ndarray (optional)
+        Covariance matrix of spec_fluxes in lower banded form, with
+        shape (..., n_bands, len(spec_wavs)), where spec_covar[..., q, k]
+        is the covariance of old bins k+q and k. Used in place of
+        spec_errs if the uncertainties are correlated. Only supported
+        for 1D new_wavs and spec_wavs.
+
+    return_covariance : bool (optional)
+        If True also return the covariance matrix of new_fluxes, which
+        is banded because neighbouring new bins share old bins. Requires
+        spec_errs or spec_covar, and 1D new_wavs and spec_wavs.
+
+    mask : numpy.ndarray (optional)
+        Boolean array, broadcastable to the shape of spec_fluxes, which
+        is True for bad pixels to be ignored (as in numpy.ma). Each new
+        bin is the weighted mean of the good pixels it overlaps, and new
+        bins with no good pixels are set to fill.
+
+    ignore_nan : bool (optional)
+        If True, pixels where spec_fluxes (or spec_errs) is NaN are
+        ignored, in addition to any in mask.
+
+    return_coverage : bool (optional)
+        If True also return the fraction of each new bin covered by good
+        pixels, which is zero for new bins outside spec_wavs.
+
+    stats : callable (optional)
+        Function called with a dictionary of timings and statistics for
+        this call, in the format described by spectres.profile.
+
+    lsf_sigma : float or numpy.ndarray (optional)
+        Standard deviation of a Gaussian line-spread function, either a
+        single value or one for each entry in new_wavs, in the same
+        units as new_wavs. If given, the spectra are convolved with the
+        line-spread function and resampled in one sparse product (see
+        ResamplingPlan), in place of the backend. Only supported for
+        1D new_wavs and spec_wavs.
+
+    resolution : float or numpy.ndarray (optional)
+        Resolving power R = wavelength/FWHM of the line-spread function,
+        used in place of lsf_sigma.
+
+    axis : int (optional)
+        Axis of spec_fluxes (and spec_errs, out and out_errs) which
+        corresponds to spec_wavs, by default the last. The same axis of
+        new_fluxes corresponds to new_wavs. Arrays stored wavelength
+        first (e.g. C-contiguous with axis=0) are resampled without
+        being transposed, and new_fluxes is stored wavelength first in
+        the same way. Only supported for 1D new_wavs and spec_wavs.
+
+    Returns
+    -------
+
+    new_fluxes : numpy.ndarray
+        Array of resampled flux values, last dimension is the same
+        length as new_wavs, other dimensions are the same as
+        spec_fluxes.
+
+    new_errs : numpy.ndarray
+        Array of uncertainties associated with fluxes in new_fluxes.
+        Only returned if spec_errs or spec_covar was specified.
+
+    new_covar : numpy.ndarray
+        Covariance matrix of new_fluxes in lower banded form, with shape
+        (..., n_bands, len(new_wavs)), where new_covar[..., d, i] is the
+        covariance of new bins i+d and i. This is the layout used by
+        scipy.linalg.solveh_banded. Only returned if return_covariance
+        is True.
+
+    coverage : numpy.ndarray
+        Fraction of each new bin covered by good pixels, the same shape
+        as new_fluxes. Only returned if return_coverage is True.
+
+    Notes
+    -----
+
+    The NumPy engine calculates the fluxes in each new bin by summing
+    the old fluxes multiplied by the old bin widths for every new bin
+    at once with np.add.reduceat, rather than by looping over the new
+    bins. The results agree with spectres_loop to within round-off
+    error.
+
+    For float32 outputs every backend forms the products of the widths
+    with the fluxes and errors and accumulates their sums in float64,
+    rounding the result once, so new_fluxes and new_errs agree with
+    the float64 results to within float32 precision (a relative
+    difference of order 1e-7, measured against the magnitude of the
+    fluxes being averaged).
+
+    After calling set_cache, the bins and overlaps calculated for each
+    pair of new_wavs and spec_wavs are cached, so repeated calls with
+    the same grids (e.g. many spectra resampled one at a time) skip
+    this setup.
+
+    If spec_fluxes is a chunked lazy array (a dask array), new_fluxes
+    and new_errs are lazy arrays too, chunked in the same way along
+    every axis but the last. The bins and overlaps are calculated once
+    when spectres is called and shared by every chunk, which is
+    resampled when the result is computed.
+    """
+
+    call_time = time.perf_counter()
+    profiled = stats is not None or profiling()
+
+    if profiled:
+        memory = start_memory()
+
+    # Rename the input variables for clarity within the function.
+    old_wavs = spec_wavs
+    old_fluxes = spec_fluxes
+    old_errs = spec_errs
+
+    if old_errs is not None and old_errs.shape != old_fluxes.shape:
+        raise ValueError("If specified, spec_errs must be the same shape "
+                         "as spec_fluxes.")
+
+    # Chunked lazy arrays are resampled block by block when computed
+    if _is_lazy(old_fluxes) or _is_lazy(old_errs):
+        if (grid is not None or n_jobs not in (None, 1) or out is not None
+                or out_errs is not None or workspace is not None
+                or spec_covar is not None or return_covariance
+                or mask is not None or ignore_nan or return_coverage
+                or axis not in (-1, old_fluxes.ndim - 1)):
+            raise ValueError("Lazy arrays can only be resampled along their "
+                             "last axis, with the fill, verbose, backend, "
+                             "dtype, preserve_dtype, lsf_sigma and "
+                             "resolution options.")
+
+        from .lazy import spectres_lazy
+
+        return spectres_lazy(new_wavs, spec_wavs, old_fluxes, old_errs,
+                             fill=fill, verbose=verbose, backend=backend,
+                             dtype=dtype, preserve_dtype=preserve_dtype,
+                             lsf_sigma=lsf_sigma, resolution=resolution)
+
+    covariance = return_covariance or spec_covar is not None
+
+    if not -old_fluxes.ndim <= axis < old_fluxes.ndim:
+        raise ValueError("axis %d is out of bounds for spec_fluxes with %d "
+                         "dimensions." % (axis, old_fluxes.ndim))
+
+    # Other axes are resampled through views with that axis moved last
+    moved = axis % old_fluxes.ndim != old_fluxes.ndim - 1
+
+    if moved:
+        if np.ndim(spec_wavs) != 1 or np.ndim(new_wavs) != 1:
+            raise ValueError("axis can only be used if spec_wavs and "
+                             "new_wavs are 1D.")
+
+        if covariance or n_jobs not in (None, 1):
+            raise ValueError("axis cannot be combined with covariances or "
+                             "n_jobs.")
+
+        old_fluxes = np.moveaxis(old_fluxes, axis, -1)
+
+        if mask is not None:
+            mask = np.moveaxis(np.broadcast_to(mask, spec_fluxes.shape),
+                               axis, -1)
+
+        given = (out, out_errs)
+
+        old_errs, out, out_errs = (
+            None if array is None else np.moveaxis(array, axis, -1)
+            for array in (old_errs, out, out_errs))
+
+    if covariance:
+        if np.ndim(spec_wavs) != 1 or np.ndim(new_wavs) != 1:
+            raise ValueError("Covariances can only be calculated if "
+                             "spec_wavs and new_wavs are 1D.")
+
+        from .resampling_plan import _covariance_bands
+
+        covar_bands = _covariance_bands(old_errs, spec_covar)
+
+        # The diagonal gives the uncertainties for the resampling engine
+        if old_errs is None:
+            old_errs = np.ascontiguousarray(np.broadcast_to(
+                np.sqrt(covar_bands[..., 0, :]), old_fluxes.shape))
+
+    smoothed = lsf_sigma is not None or resolution is not None
+
+    if smoothed and (np.ndim(spec_wavs) != 1 or np.ndim(new_wavs) != 1):
+        raise ValueError("A line-spread function can only be applied if "
+                         "spec_wavs and new_wavs are 1D.")
+
+    masked = mask is not None or ignore_nan
+
+    if masked and covariance:
+        raise ValueError("Covariances cannot be calculated for masked "
+                         "spectra.")
+
+    # Line up 2D wavelength arrays with the first axis of the fluxes
+    old_wavs = _align_wavs(old_wavs, old_fluxes, "spec_wavs")
+    new_wavs = _align_wavs(new_wavs, old_fluxes, "new_wavs")
+
+    if n_jobs not in (None, 1):
+        if old_wavs.ndim != 1 or new_wavs.ndim != 1:
+            raise ValueError("n_jobs can only be used if spec_wavs and "
+                             "new_wavs are 1D.")
+
+        if (covariance or masked or return_coverage or smoothed
+                or workspace is not None):
+            raise ValueError("n_jobs cannot be combined with covariances, "
+                             "masks, coverage, a workspace or a line-spread "
+                             "function.")
+
+        from .parallel import ParallelResampler
+
+        with ParallelResampler(new_wavs, old_wavs, n_jobs=n_jobs, fill=fill,
+                               verbose=verbose, backend=backend,
+                               dtype=dtype, preserve_dtype=preserve_dtype,
+                               grid=grid) as resampler:
+            grids_time = time.perf_counter()
+            results = resampler(old_fluxes, old_errs, out=out,
+                                out_errs=out_errs)
+            resample_time = time.perf_counter()
+
+        if profiled:
+            state = resampler._state
+            overlaps = state["overlaps"]
+            new_arrays = (results,) if old_errs is None else results
+            end_time = time.perf_counter()
+
+            # Starting and stopping the workers is only counted in total
+            times = dict(resampler.setup_times,
+                         resample=resample_time - grids_time,
+                         post=0., total=end_time - call_time)
+
+            allocated = ([state["old_edges"], state["old_widths"],
+                          state["new_edges"]] + list(overlaps)
+                         + list(new_arrays))
+
+            _report_call(stats, memory, times, allocated, (out, out_errs),
+                         overlaps[1] - overlaps[0] + 1, overlaps[4],
+                         new_arrays[0], old_fluxes.shape[-1],
+                         resampler.backend)
+
+        return results
+
+    def make_grids(new_wavs, old_wavs):
+        grid_name = grid_type(old_wavs) if grid == "auto" else grid
+
+        # Make arrays of edge positions and widths for the old and new bins
+        if workspace is not None:
+            return workspace.update(new_wavs, old_wavs, grid=grid_name)
+
+        old_edges, old_widths = make_bins(old_wavs)
+        new_edges, new_widths = make_bins(new_wavs)
+        times.append(time.perf_counter())
+
+        overlaps = find_overlaps(old_edges, old_widths, new_edges,
+                                 grid=grid_name)
+
+        return old_edges, old_widths, new_edges, overlaps
+
+    # Load the backend first, a workspace uses its compiled overlap search
+    resample = get_backend(backend)
+
+    # Large wavelength-major arrays are resampled a block of rows at a
+    # time, rather than by the backend through strided views
+    rows = moved and old_fluxes.size >= _min_values_per_bin*new_wavs.shape[-1]
+
+    if rows:
+        resample = _row_resample
+    times = [time.perf_counter()]
+
+    # Reuse the bins and overlaps from the cache if set_cache was called
+    if workspace is not None:
+        old_edges, old_widths, new_edges, overlaps = \
+            make_grids(new_wavs, old_wavs)
+
+    else:
+        old_edges, old_widths, new_edges, overlaps = \
+            grid_cache.get(new_wavs, old_wavs, make_grids)
+
+    # The plan convolves and resamples with one sparse product
+    if smoothed:
+        from .resampling_plan import ResamplingPlan
+
+        plan = ResamplingPlan(new_wavs, old_wavs, fill=fill, verbose=False,
+                              lsf_sigma=lsf_sigma, resolution=resolution)
+        resample = plan.engine
+
+    grids_time = time.perf_counter()
+
+    if dtype is None and out is not None:
+        dtype = out.dtype
+
+    dtype = _output_dtype(old_fluxes, dtype, preserve_dtype)
+
+    # Resampling is linear, so resampling the good pixels (with the bad
+    # ones zeroed) and the good pixel mask gives the weighted sum over
+    # good pixels and the weight of good pixels in each new bin
+    if masked or return_coverage:
+        good = np.ones(old_fluxes.shape[-1:], dtype=bool)
+
+        if mask is not None:
+            good = ~np.asarray(mask, dtype=bool)
+
+        if ignore_nan:
+            good = good & ~np.isnan(old_fluxes)
+
+            if old_errs is not None:
+                good &= ~np.isnan(old_errs)
+
+        if masked:
+            old_fluxes = np.where(good, old_fluxes, 0.)
+
+            if old_errs is not None:
+                old_errs = np.where(good, old_errs, 0.)
+
+        coverage = resample(old_edges, old_widths, new_edges,
+                            good.astype(dtype), fill=0., overlaps=overlaps,
+                            dtype=dtype)[0]
+
+    new_fluxes, new_errs, inside = resample(
+        old_edges, old_widths, new_edges, old_fluxes, old_errs, fill=fill,
+        overlaps=overlaps, dtype=dtype, out=out, out_errs=out_errs)
+
+    resample_time = time.perf_counter()
+
+    if verbose and not np.all(inside[..., [0, -1]]):
+        _warn_fill()
+
+    if masked:
+        covered = coverage > 0.
+        fill_value = np.nan if fill is None else fill
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            new_fluxes[...] = np.where(covered, new_fluxes/coverage,
+                                       fill_value)
+
+            if old_errs is not None:
+                new_errs[...] = np.where(covered, new_errs/coverage,
+                                         fill_value)
+
+    if covariance:
+        from .resampling_plan import _csr_weights, _banded_covariance
+
+        if smoothed:
+            indptr, weights, start = plan.indptr, plan.weights, plan._start
+
+        else:
+            indptr, indices, weights, counts = _csr_weights(old_widths,
+                                                            overlaps)
+            start = overlaps[0]
+
+        new_covar = _banded_covariance(indptr, weights, start, inside,
+                                       covar_bands, fill=fill)
+        new_covar = new_covar.astype(new_fluxes.dtype, copy=False)
+
+        # Correlated old uncertainties change the new uncertainties
+        if spec_covar is not None:
+            new_errs[...] = np.sqrt(new_covar[..., 0, :])
+
+    # Return new_fluxes, followed by new_errs if errors were supplied and
+    # any other outputs which were asked for
+    results = (new_fluxes,)
+
+    if old_errs is not None:
+        results += (new_errs,)
+
+    if return_covariance:
+        results += (new_covar,)
+
+    if return_coverage:
+        results += (np.broadcast_to(coverage, new_fluxes.shape),)
+
+    if profiled:
+        end_time = time.perf_counter()
+        bins_time = times[-1]
+        allocated = list(results)
+
+        # Only count the bins and overlaps if they were calculated here
+        if len(times) > 1:
+            allocated += [old_edges, old_widths, new_edges] + list(overlaps)
+
+        start, stop = overlaps[0], overlaps[1]
+        per_bin = stop - start + 1
+
+        # The line-spread function spreads each new bin over more pixels
+        if smoothed:
+            allocated += [plan.indptr, plan.indices, plan.weights]
+            per_bin = np.diff(plan.indptr)
+
+        times = {"bins": bins_time - times[0],
+                 "overlaps": grids_time - bins_time,
+                 "resample": resample_time - grids_time,
+                 "post": end_time - resample_time,
+                 "total": end_time - call_time}
+
+        _report_call(stats, memory, times, allocated, (out, out_errs),
+                     per_bin, inside, new_fluxes, old_fluxes.shape[-1],
+                     "lsf" if smoothed else "rows" if rows
+                     else resolve_backend(backend))
+
+    if moved:
+        results = [np.moveaxis(array, -1, axis) for array in results]
+
+        # Views of out and out_errs are swapped for the arrays themselves
+        if given[0] is not None:
+            results[0] = given[0]
+
+        if old_errs is not None and given[1] is not None:
+            results[1] = given[1]
+
+        results = tuple(results)
+
+    return results if len(results) > 1 else results[0]
+
+
+def spectres_loop(new_wavs, spec_wavs, spec_fluxes, spec_errs=None,
+                  fill=None, verbose=True):
+
+    """
+    Function for resampling spectra (and optionally associated
+    uncertainties) onto a new wavelength basis. This is the reference
+    implementation which loops over the new bins, spectres gives the
+    same results to within round-off error.
+
+    Parameters
+    ----------
+
     new_wavs : numpy.ndarray
         Array containing the new wavelength sampling desired for the
         spectrum or spectra.
@@ -101,13 +1128,7 @@ def spectres(new_wavs, spec_wavs, spec_fluxes, spec_errs=None, fill=None,
                 new_errs[..., j] = fill
 
             if (j == 0 or j == new_wavs.shape[0]-1) and verbose:
-                warnings.warn(
-                    "Spectres: new_wavs contains values outside the range "
-                    "in spec_wavs, new_fluxes and new_errs will be filled "
-                    "with the value set in the 'fill' keyword argument "
-                    "(by default 0).",
-                    category=RuntimeWarning,
-                )
+                _warn_fill()
             continue
 
         # Find first old bin which is partially covered by the new bin
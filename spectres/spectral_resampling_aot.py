@@ -0,0 +1,45 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from . import _spectres_aot
+from .backends import register_backend
+from .compiled import compiled_resample
+
+
+def _aot_kernel(start, stop, start_widths, stop_widths, inside, old_widths,
+                old_fluxes, old_errs, has_errs, fill, bin_rows, width_rows,
+                flux_rows, new_fluxes, new_errs):
+    """ Call the ahead-of-time compiled kernel for the data types of the
+    fluxes and outputs, which was compiled for float64 widths. """
+
+    kernel = getattr(_spectres_aot, "resample_%s_%s" % (
+        old_fluxes.dtype.name, new_fluxes.dtype.name), None)
+
+    if kernel is None:
+        raise ValueError("The aot backend was not built for %s fluxes with "
+                         "%s outputs, rebuild it with python -m "
+                         "spectres.compile --aot." % (old_fluxes.dtype.name,
+                                                      new_fluxes.dtype.name))
+
+    kernel(start, stop, np.asarray(start_widths, dtype=float),
+           np.asarray(stop_widths, dtype=float), inside,
+           np.asarray(old_widths, dtype=float), old_fluxes, old_errs,
+           has_errs, fill, bin_rows, width_rows, flux_rows, new_fluxes,
+           new_errs)
+
+
+def _aot_resample(old_edges, old_widths, new_edges, old_fluxes,
+                  old_errs=None, fill=None, overlaps=None, dtype=None,
+                  out=None, out_errs=None):
+    """ Resampling engine using the kernel compiled ahead of time by
+    python -m spectres.compile --aot, which does not need Numba to be
+    imported. """
+
+    return compiled_resample(_aot_kernel, old_edges, old_widths, new_edges,
+                             old_fluxes, old_errs, fill=fill,
+                             overlaps=overlaps, dtype=dtype, out=out,
+                             out_errs=out_errs)
+
+
+register_backend("aot", _aot_resample, priority=True)
@@ -1,174 +1,187 @@
 from __future__ import print_function, division, absolute_import
+import threading
 
 import numpy as np
-from numba import jit
+from numba import jit, prange
+
+from .backends import register_backend
+from .compiled import compiled_resample
+from .spectral_resampling import make_bins, _warn_fill
+
+
+# Number of new bins handled by each parallel task
+block_size = 256
+
+
+@jit(nopython=True, inline="always")
+def _resample_body(start, stop, start_widths, stop_widths, inside,
+                   old_widths, old_fluxes, old_errs, has_errs, fill,
+                   bin_rows, width_rows, flux_rows, new_fluxes, new_errs):
+    """ Resample each row of old_fluxes (and old_errs), looping with
+    prange over blocks of new bins for every row. Row i of the output
+    uses row bin_rows[i] of the overlap arrays, width_rows[i] of
+    old_widths and flux_rows[i] of old_fluxes and old_errs. Inlined
+    into the parallel and serial kernels below. """
+
+    n_rows = new_fluxes.shape[0]
+    n_new = new_fluxes.shape[1]
+    n_blocks = (n_new + block_size - 1)//block_size
+
+    for task in prange(n_rows*n_blocks):
+        row = task//n_blocks
+        first = (task % n_blocks)*block_size
+        last = min(first + block_size, n_new)
+
+        b = bin_rows[row]
+        w = width_rows[row]
+        f = flux_rows[row]
+
+        for j in range(first, last):
+            s = start[b, j]
+            e = stop[b, j]
+
+            # Add filler values if new_wavs extends outside of spec_wavs
+            if not inside[b, j]:
+                new_fluxes[row, j] = fill
+                if has_errs:
+                    new_errs[row, j] = fill
+                continue
+
+            # If new bin is fully inside an old bin start and stop are equal
+            if e == s:
+                new_fluxes[row, j] = old_fluxes[f, s]
+                if has_errs:
+                    new_errs[row, j] = old_errs[f, s]
+                continue
+
+            # Otherwise sum over the old bins, weighting the first and
+            # last by the fraction of them inside the new bin
+            width_sum = start_widths[b, j] + stop_widths[b, j]
+            flux_sum = (start_widths[b, j]*old_fluxes[f, s]
+                        + stop_widths[b, j]*old_fluxes[f, e])
+
+            for i in range(s+1, e):
+                width_sum += old_widths[w, i]
+                flux_sum += old_widths[w, i]*old_fluxes[f, i]
+
+            new_fluxes[row, j] = flux_sum/width_sum
+
+            if has_errs:
+                err_sum = ((start_widths[b, j]*old_errs[f, s])**2
+                           + (stop_widths[b, j]*old_errs[f, e])**2)
+
+                for i in range(s+1, e):
+                    err_sum += (old_widths[w, i]*old_errs[f, i])**2
+
+                new_errs[row, j] = np.sqrt(err_sum)/width_sum
+
+
+# The two kernels are separate functions so that each has its own
+# entry in Numba's on-disk cache, which does not tell parallel and
+# serial builds of the same function apart
+@jit(nopython=True, parallel=True, nogil=True, cache=True)
+def _resample_kernel(start, stop, start_widths, stop_widths, inside,
+                     old_widths, old_fluxes, old_errs, has_errs, fill,
+                     bin_rows, width_rows, flux_rows, new_fluxes, new_errs):
+    """ Resample in parallel over every row and block of new bins. """
+    _resample_body(start, stop, start_widths, stop_widths, inside,
+                   old_widths, old_fluxes, old_errs, has_errs, fill,
+                   bin_rows, width_rows, flux_rows, new_fluxes, new_errs)
+
+
+# Serial version of the kernel for use outside the main thread and by
+# the workers of ParallelResampler, which already run in parallel with
+# each other and request it with _serial=True (calling the parallel
+# kernel from several threads at once can deadlock some of the Numba
+# threading layers, and starting TBB's pool from another thread can
+# hang the interpreter at exit).
+@jit(nopython=True, nogil=True, cache=True)
+def _resample_kernel_serial(start, stop, start_widths, stop_widths, inside,
+                            old_widths, old_fluxes, old_errs, has_errs, fill,
+                            bin_rows, width_rows, flux_rows, new_fluxes,
+                            new_errs):
+    """ Resample every row and block of new bins in turn. """
+    _resample_body(start, stop, start_widths, stop_widths, inside,
+                   old_widths, old_fluxes, old_errs, has_errs, fill,
+                   bin_rows, width_rows, flux_rows, new_fluxes, new_errs)
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def _find_overlaps_kernel(old_edges, old_widths, new_edges, start, stop,
+                          start_widths, stop_widths, inside):
+    """ Equivalent of find_overlaps for 1D edges, which writes into
+    existing arrays using the incremental while-scans of spectres. """
+
+    n_old = old_widths.shape[0]
+    s = 0
+    e = 0
+
+    for j in range(new_edges.shape[0]-1):
+        inside[j] = ((new_edges[j] >= old_edges[0])
+                     and (new_edges[j+1] <= old_edges[-1]))
 
+        # Find first old bin which is partially covered by the new bin
+        while s < n_old-1 and old_edges[s+1] <= new_edges[j]:
+            s += 1
 
-@jit(nopython=True, cache=True)
-def make_bins(wavs):
-    """ Given a series of wavelength points, find the edges and widths
-    of corresponding wavelength bins. """
-    edges = np.zeros(wavs.shape[0]+1)
-    widths = np.zeros(wavs.shape[0])
-    edges[0] = wavs[0] - (wavs[1] - wavs[0])/2
-    widths[-1] = (wavs[-1] - wavs[-2])
-    edges[-1] = wavs[-1] + (wavs[-1] - wavs[-2])/2
-    edges[1:-1] = (wavs[1:] + wavs[:-1])/2
-    widths[:-1] = edges[1:-1] - edges[:-2]
-
-    return edges, widths
-
-
-def spectres_numba(new_wavs, spec_wavs, spec_fluxes, spec_errs=None, fill=0,
-                   verbose=True):
-    """
-    Wrapper function to preserve interface when using Numba
-    """
-
-    new_fluxes, new_errs = spnumba(new_wavs, spec_wavs, spec_fluxes,
-                                   spec_errs=spec_errs, fill=fill,
-                                   verbose=verbose)
-
-    # If errors not supplied, only return the fluxes not array of zeros
-    if spec_errs is None:
-        return new_fluxes
-    # But if they were, we should return everything
-    else:
-        return new_fluxes, new_errs
-
+        # Find last old bin which is partially covered by the new bin
+        while e < n_old-1 and old_edges[e+1] < new_edges[j+1]:
+            e += 1
 
-@jit(nopython=True, cache=True)
-def spnumba(new_wavs, spec_wavs, spec_fluxes, spec_errs=None, fill=0,
-            verbose=True):
+        start[j] = s
+        stop[j] = e
 
-    """
-    Function for resampling spectra (and optionally associated
-    uncertainties) onto a new wavelength basis.
+        start_widths[j] = old_widths[s]*((old_edges[s+1] - new_edges[j])
+                                         / (old_edges[s+1] - old_edges[s]))
 
-    Parameters
-    ----------
+        stop_widths[j] = old_widths[e]*((new_edges[j+1] - old_edges[e])
+                                        / (old_edges[e+1] - old_edges[e]))
 
-    new_wavs : numpy.ndarray
-        Array containing the new wavelength sampling desired for the
-        spectrum or spectra.
 
-    spec_wavs : numpy.ndarray
-        1D array containing the current wavelength sampling of the
-        spectrum or spectra.
+def _numba_resample(old_edges, old_widths, new_edges, old_fluxes,
+                    old_errs=None, fill=None, overlaps=None, dtype=None,
+                    out=None, out_errs=None, _serial=False):
+    """ Numba resampling engine, which runs every spectrum and block of
+    new bins in parallel from the main thread, or serially from any
+    other thread or if _serial is True. """
 
-    spec_fluxes : numpy.ndarray
-        Array containing spectral fluxes at the wavelengths specified in
-        spec_wavs, last dimension must correspond to the shape of
-        spec_wavs. Extra dimensions before this may be used to include
-        multiple spectra.
-
-    spec_errs : numpy.ndarray (optional)
-        Array of the same shape as spec_fluxes containing uncertainties
-        associated with each spectral flux value.
+    if _serial or threading.current_thread() is not threading.main_thread():
+        kernel = _resample_kernel_serial
+    else:
+        kernel = _resample_kernel
 
-    fill : float (optional)
-        Where new_wavs extends outside the wavelength range in spec_wavs
-        this value will be used as a filler in new_fluxes and new_errs.
+    return compiled_resample(kernel, old_edges, old_widths, new_edges,
+                             old_fluxes, old_errs, fill=fill,
+                             overlaps=overlaps, dtype=dtype, out=out,
+                             out_errs=out_errs)
 
-    verbose : bool (optional)
-        Setting verbose to False will suppress the default warning about
-        new_wavs extending outside spec_wavs and "fill" being used.
 
-    Returns
-    -------
+register_backend("numba", _numba_resample, priority=True, nogil=True)
 
-    new_fluxes : numpy.ndarray
-        Array of resampled flux values, first dimension is the same
-        length as new_wavs, other dimensions are the same as
-        spec_fluxes.
 
-    new_errs : numpy.ndarray
-        Array of uncertainties associated with fluxes in new_fluxes.
-        Only returned if spec_errs was specified.
+def spectres_numba(new_wavs, spec_wavs, spec_fluxes, spec_errs=None, fill=0,
+                   verbose=True):
+    """
+    Numba compiled version of spectres, equivalent to calling spectres
+    with backend="numba" (but with fill=0 by default).
     """
 
-    # Rename the input variables for clarity within the function.
-    old_wavs = spec_wavs
-    old_fluxes = spec_fluxes
-    old_errs = spec_errs
-
-    # Make arrays of edge positions and widths for the old and new bins
+    if spec_errs is not None and spec_errs.shape != spec_fluxes.shape:
+        raise ValueError("If specified, spec_errs must be the same shape "
+                         "as spec_fluxes.")
 
-    old_edges, old_widths = make_bins(old_wavs)
+    old_edges, old_widths = make_bins(spec_wavs)
     new_edges, new_widths = make_bins(new_wavs)
 
-    # Generate output arrays to be populated
-    # ndarray.shape often doesn't compile  while np.shape(ndarray) does)
-    new_fluxes = np.zeros(np.shape(old_fluxes[..., 0]) + np.shape(new_wavs))
-
-    if old_errs is not None:
-        if old_errs.shape != old_fluxes.shape:
-            raise ValueError("If specified, spec_errs must be the same shape "
-                             "as spec_fluxes.")
-    #    else:
-    new_errs = np.zeros_like(new_fluxes)
-
-    start = 0
-    stop = 0
-    warned = False
-
-    # Calculate new flux and uncertainty values, looping over new bins
-    for j in range(new_wavs.shape[0]):
-
-        # Add filler values if new_wavs extends outside of spec_wavs
-        if (new_edges[j] < old_edges[0]) or (new_edges[j+1] > old_edges[-1]):
-            new_fluxes[..., j] = fill
-
-            if spec_errs is not None:
-                new_errs[..., j] = fill
-
-            if (j == 0 or j == new_wavs.shape[0]-1) and verbose and not warned:
-                warned = True
-                print("\nSpectres: new_wavs contains values outside the range "
-                      "in spec_wavs, new_fluxes and new_errs will be filled "
-                      "with the value set in the 'fill' keyword argument. \n")
-            continue
-
-        # Find first old bin which is partially covered by the new bin
-        while old_edges[start+1] <= new_edges[j]:
-            start += 1
-
-        # Find last old bin which is partially covered by the new bin
-        while old_edges[stop+1] < new_edges[j+1]:
-            stop += 1
-
-        # If new bin is fully inside an old bin start and stop are equal
-        if stop == start:
-            new_fluxes[..., j] = old_fluxes[..., start]
-            if old_errs is not None:
-                new_errs[..., j] = old_errs[..., start]
+    new_fluxes, new_errs, inside = _numba_resample(
+        old_edges, old_widths, new_edges, spec_fluxes, spec_errs, fill=fill)
 
-        # Otherwise multiply the first and last old bin widths by P_ij
-        else:
-            start_factor = ((old_edges[start+1] - new_edges[j])
-                            / (old_edges[start+1] - old_edges[start]))
+    if verbose and not np.all(inside[..., [0, -1]]):
+        _warn_fill()
 
-            end_factor = ((new_edges[j+1] - old_edges[stop])
-                          / (old_edges[stop+1] - old_edges[stop]))
-
-            old_widths[start] *= start_factor
-            old_widths[stop] *= end_factor
-
-            # Populate new_fluxes spectrum and uncertainty arrays
-            f_widths = old_widths[start:stop+1]*old_fluxes[..., start:stop+1]
-            new_fluxes[..., j] = np.sum(f_widths, axis=-1)
-            new_fluxes[..., j] /= np.sum(old_widths[start:stop+1])
-
-            if old_errs is not None:
-                e_wid = old_widths[start:stop+1]*old_errs[..., start:stop+1]
-
-                new_errs[..., j] = np.sqrt(np.sum(e_wid**2, axis=-1))
-                new_errs[..., j] /= np.sum(old_widths[start:stop+1])
-
-            # Put back the old bin widths to their initial values
-            old_widths[start] /= start_factor
-            old_widths[stop] /= end_factor
-
-    # numba doesn't seem to like having more than one return, so we're
-    # forcing it to return an array of zeros for the errors here
-    return new_fluxes, new_errs
\ No newline at end of file
+    # If errors not supplied, only return the fluxes
+    if spec_errs is None:
+        return new_fluxes
+    # But if they were, we should return everything
+    else:
+        return new_fluxes, new_errs
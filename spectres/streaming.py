@@ -0,0 +1,214 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from .backends import get_backend
+from .spectral_resampling import (make_bins, find_overlaps, _warn_fill,
+                                  _output_dtype)
+
+
+def stream_windows(spec_wavs, spec_fluxes, spec_errs=None,
+                   window_size=2**20):
+    """
+    Split a spectrum, usually held in memory-mapped arrays, into
+    windows of window_size pixels along its last axis for
+    spectres_stream. Each window is only read from disk when it is
+    used.
+
+    Parameters
+    ----------
+
+    spec_wavs : numpy.ndarray
+        1D array containing the wavelength sampling of the spectrum.
+
+    spec_fluxes : numpy.ndarray
+        Array containing spectral fluxes at the wavelengths specified in
+        spec_wavs, last dimension must correspond to the shape of
+        spec_wavs.
+
+    spec_errs : numpy.ndarray (optional)
+        Array of the same shape as spec_fluxes containing uncertainties
+        associated with each spectral flux value.
+
+    window_size : int (optional)
+        Number of pixels in each window.
+
+    Returns
+    -------
+
+    windows : generator
+        Generator of (wavs, fluxes) or (wavs, fluxes, errs) tuples.
+    """
+
+    for first in range(0, spec_wavs.shape[0], window_size):
+        window = slice(first, first + window_size)
+
+        if spec_errs is None:
+            yield spec_wavs[window], spec_fluxes[..., window]
+
+        else:
+            yield (spec_wavs[window], spec_fluxes[..., window],
+                   spec_errs[..., window])
+
+
+def spectres_stream(new_wavs, windows, fill=None, verbose=True,
+                    backend="auto", dtype=None, preserve_dtype=False):
+    """
+    Generator for resampling a spectrum too long to hold in memory,
+    which is read in consecutive windows along its wavelength axis.
+    Pixels which overlap a new bin that is not yet complete are carried
+    over to the next window, and each run of new bins is yielded as
+    soon as all of the pixels it overlaps have been read, so the memory
+    used is set by the window size (plus the pixels in one new bin).
+    Joining the yielded arrays along their last axis gives the same
+    result as a single call to spectres on the whole spectrum.
+
+    Parameters
+    ----------
+
+    new_wavs : numpy.ndarray
+        1D array containing the new wavelength sampling desired for the
+        spectrum.
+
+    windows : iterable
+        Iterable of (wavs, fluxes) or (wavs, fluxes, errs) tuples,
+        consecutive pieces of the spectrum in order of increasing
+        wavelength, e.g. from stream_windows. The last dimension of
+        fluxes and errs corresponds to wavs, any earlier dimensions
+        must be the same for every window.
+
+    fill : float (optional)
+        Where new_wavs extends outside the wavelength range of the
+        spectrum this value will be used as a filler in new_fluxes and
+        new_errs.
+
+    verbose : bool (optional)
+        Setting verbose to False will suppress the default warning about
+        new_wavs extending outside the spectrum and "fill" being used.
+
+    backend : str (optional)
+        Name of the resampling engine to use, see available_backends.
+
+    dtype : numpy.dtype (optional)
+        Data type of new_fluxes and new_errs, float64 by default.
+
+    preserve_dtype : bool (optional)
+        If True (and dtype is not set) new_fluxes and new_errs have the
+        same data type as the fluxes.
+
+    Returns
+    -------
+
+    new_fluxes : generator
+        Generator of arrays of resampled fluxes for consecutive runs of
+        new bins, or of (new_fluxes, new_errs) tuples if the windows
+        include uncertainties.
+    """
+
+    new_edges, new_widths = make_bins(np.asarray(new_wavs))
+    n_new = new_edges.shape[0] - 1
+    resample = get_backend(backend)
+
+    # Pixels carried over from earlier windows and the left edge of the
+    # first of them, which depends on the pixel before it
+    wavs, fluxes, errs = None, None, None
+    left_edge = None
+
+    # Index of the first new bin not yet returned
+    next_bin = 0
+    warned = not verbose
+
+    windows = iter(windows)
+    window = next(windows, None)
+
+    while window is not None:
+        if wavs is None:
+            wavs, fluxes = np.asarray(window[0]), np.asarray(window[1])
+            errs = np.asarray(window[2]) if len(window) > 2 else None
+
+        else:
+            wavs = np.concatenate([wavs, window[0]])
+            fluxes = np.concatenate([fluxes, window[1]], axis=-1)
+
+            if errs is not None:
+                errs = np.concatenate([errs, window[2]], axis=-1)
+
+        window = next(windows, None)
+        last = window is None
+
+        if wavs.shape[0] < 2:
+            if last:
+                raise ValueError("The spectrum must contain at least two "
+                                 "pixels.")
+            continue
+
+        # Bins are found as by make_bins, but the right edge of the last
+        # pixel is only known once the next pixel (or the end) is read
+        old_edges = np.zeros(wavs.shape[0] + 1)
+
+        if left_edge is None:
+            old_edges[0] = wavs[0] - (wavs[1] - wavs[0])/2
+
+        else:
+            old_edges[0] = left_edge
+
+        np.add(wavs[1:], wavs[:-1], out=old_edges[1:-1])
+        old_edges[1:-1] /= 2
+
+        if last:
+            old_edges[-1] = wavs[-1] + (wavs[-1] - wavs[-2])/2
+            old_widths = np.diff(old_edges)
+            old_widths[-1] = wavs[-1] - wavs[-2]
+            complete = wavs.shape[0]
+
+        else:
+            old_edges = old_edges[:-1]
+            old_widths = np.diff(old_edges)
+            complete = wavs.shape[0] - 1
+
+        # New bins which end within the complete pixels, or all of the
+        # remaining bins once the end of the spectrum has been read
+        if last:
+            stop_bin = n_new
+
+        else:
+            stop_bin = max(np.searchsorted(new_edges[1:], old_edges[-1],
+                                           side="right"), next_bin)
+
+        if stop_bin > next_bin:
+            run_edges = new_edges[next_bin:stop_bin+1]
+            overlaps = find_overlaps(old_edges, old_widths, run_edges)
+
+            new_fluxes, new_errs, inside = resample(
+                old_edges, old_widths, run_edges, fluxes[..., :complete],
+                None if errs is None else errs[..., :complete], fill=fill,
+                overlaps=overlaps,
+                dtype=_output_dtype(fluxes, dtype, preserve_dtype))
+
+            if not warned and not np.all(inside):
+                _warn_fill()
+                warned = True
+
+            next_bin = stop_bin
+
+            if errs is None:
+                yield new_fluxes
+
+            else:
+                yield new_fluxes, new_errs
+
+        if last or next_bin == n_new:
+            break
+
+        # Carry over the pixels which reach the start of the next bin,
+        # and at least two for the width of the last pixel
+        keep = min(np.searchsorted(old_edges[1:], new_edges[next_bin],
+                                   side="left"), wavs.shape[0] - 2)
+
+        if keep > 0:
+            left_edge = old_edges[keep]
+            wavs = wavs[keep:]
+            fluxes = fluxes[..., keep:]
+
+            if errs is not None:
+                errs = errs[..., keep:]
@@ -0,0 +1,74 @@
+from __future__ import print_function, division, absolute_import
+
+import sys
+
+import numpy as np
+
+from .spectral_resampling import make_bins, find_overlaps
+
+
+class Workspace(object):
+    """
+    Preallocated arrays for the bin edges, widths and overlaps which
+    spectres calculates on each call. Passing a Workspace to spectres
+    with the workspace keyword argument fills these arrays in place
+    rather than allocating new ones, which is useful when spectres is
+    called many times, e.g. inside a likelihood function. The grids
+    may change from call to call as long as their lengths do not.
+
+    Parameters
+    ----------
+
+    new_wavs : numpy.ndarray
+        1D array with the same length as the new wavelength sampling
+        which will be passed to spectres.
+
+    spec_wavs : numpy.ndarray
+        1D array with the same length as the current wavelength
+        sampling which will be passed to spectres.
+    """
+
+    def __init__(self, new_wavs, spec_wavs):
+
+        n_new = new_wavs.shape[0]
+        n_old = spec_wavs.shape[0]
+
+        self.old_edges = np.zeros(n_old+1)
+        self.old_widths = np.zeros(n_old)
+        self.new_edges = np.zeros(n_new+1)
+        self.new_widths = np.zeros(n_new)
+
+        self.overlaps = (np.zeros(n_new, dtype=np.intp),
+                         np.zeros(n_new, dtype=np.intp),
+                         np.zeros(n_new), np.zeros(n_new),
+                         np.zeros(n_new, dtype=bool))
+
+    def update(self, new_wavs, spec_wavs, grid=None):
+        """ Fill the arrays for a new pair of wavelength grids, returning
+        the old edges, old widths, new edges and overlaps. """
+
+        if (new_wavs.shape != self.new_widths.shape
+                or spec_wavs.shape != self.old_widths.shape):
+            raise ValueError("The workspace was made for a new_wavs of shape "
+                             "%s and spec_wavs of shape %s."
+                             % (self.new_widths.shape, self.old_widths.shape))
+
+        make_bins(spec_wavs, self.old_edges, self.old_widths)
+        make_bins(new_wavs, self.new_edges, self.new_widths)
+
+        # Use the compiled overlap search if the Numba backend has been
+        # loaded, rather than importing Numba just for this
+        numba_module = sys.modules.get("spectres.spectral_resampling_numba")
+
+        if numba_module is not None:
+            numba_module._find_overlaps_kernel(self.old_edges, self.old_widths,
+                                               self.new_edges, *self.overlaps)
+
+        else:
+            overlaps = find_overlaps(self.old_edges, self.old_widths,
+                                     self.new_edges, grid=grid)
+
+            for array, values in zip(self.overlaps, overlaps):
+                array[:] = values
+
+        return self.old_edges, self.old_widths, self.new_edges, self.overlaps
@@ -0,0 +1,41 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+
+backends = spectres.available_backends()
+
+rng = np.random.RandomState(0)
+
+# Old grid with uneven pixels, and new grids inside it and overlapping
+# both of its ends
+spec_wavs = np.sort(rng.uniform(4000., 6000., 300))
+new_wavs = np.linspace(4100., 5900., 90)
+wide_wavs = np.linspace(3900., 6100., 120)
+
+spec_fluxes = rng.normal(1., 0.2, (3, 4, spec_wavs.shape[0]))
+spec_errs = rng.uniform(0.05, 0.1, spec_fluxes.shape)
+
+
+def weight_matrix(new_wavs, spec_wavs):
+    """ Dense (len(new_wavs), len(spec_wavs)) matrix applied to the
+    fluxes by spectres, found by resampling the identity with
+    spectres_loop. """
+    eye = np.eye(spec_wavs.shape[0])
+    return spectres_loop(new_wavs, spec_wavs, eye, fill=0.,
+                         verbose=False).T
+
+
+def banded(matrix, n_bands):
+    """ Lower banded form of a symmetric matrix, as used by spec_covar
+    and new_covar. """
+    n = matrix.shape[0]
+    bands = np.zeros((n_bands, n))
+
+    for d in range(n_bands):
+        bands[d, :n-d] = np.diagonal(matrix, -d)
+
+    return bands
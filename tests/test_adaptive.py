@@ -0,0 +1,90 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import make_bins, spectres_loop
+
+from .helpers import spec_wavs, spec_fluxes, spec_errs
+
+
+def binned(edges, fluxes, errs):
+    """ Width-weighted means of the old bins between each pair of new
+    edges, which must be old edges, summed directly. """
+    old_edges, old_widths = make_bins(spec_wavs)
+    bounds = np.searchsorted(old_edges, edges)
+    new_fluxes = []
+    new_errs = []
+
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        widths = old_widths[first:last]
+        new_fluxes.append(np.sum(widths*fluxes[..., first:last], axis=-1)
+                          / np.sum(widths))
+        new_errs.append(np.sqrt(np.sum((widths*errs[..., first:last])**2,
+                                       axis=-1))/np.sum(widths))
+
+    return np.stack(new_fluxes, axis=-1), np.stack(new_errs, axis=-1)
+
+
+@pytest.mark.parametrize("reduce", [np.min, np.median])
+def test_target_snr(reduce):
+    new_wavs, new_fluxes, new_errs, new_edges = spectres.spectres_adaptive(
+        spec_wavs, spec_fluxes, spec_errs, 40., reduce=reduce,
+        return_edges=True)
+
+    old_edges = make_bins(spec_wavs)[0]
+    snr = reduce((new_fluxes/new_errs).reshape(-1, new_wavs.shape[0]),
+                 axis=0)
+
+    assert np.all(snr >= 40.)
+    assert np.all(np.isin(new_edges, old_edges))
+    assert new_edges[0] == old_edges[0] and new_edges[-1] == old_edges[-1]
+    np.testing.assert_allclose(new_wavs, (new_edges[1:] + new_edges[:-1])/2.)
+
+    loop_fluxes, loop_errs = binned(new_edges, spec_fluxes, spec_errs)
+
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-10)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-10)
+
+
+def test_coarsest_grid():
+    new_edges = spectres.spectres_adaptive(spec_wavs, spec_fluxes[0, 0],
+                                           spec_errs[0, 0], 20.,
+                                           return_edges=True)[3]
+
+    # Every bin but the last falls short of the target without its last
+    # old bin
+    old_edges = make_bins(spec_wavs)[0]
+    bounds = np.searchsorted(old_edges, new_edges)
+
+    for first, last in zip(bounds[:-2], bounds[1:-1]):
+        if last - first > 1:
+            fluxes, errs = binned(old_edges[[first, last-1]],
+                                  spec_fluxes[0, 0], spec_errs[0, 0])
+
+            assert fluxes[0]/errs[0] < 20.
+
+
+def test_matches_loop():
+    # With a negligible target, bins of a uniform grid are all three
+    # old bins wide, so spectres finds the same edges from the centres
+    wavs = np.arange(4000., 4300.)
+
+    new_wavs, new_fluxes, new_errs = spectres.spectres_adaptive(
+        wavs, spec_fluxes, spec_errs, 1e-6, min_width=2.5)
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, wavs, spec_fluxes,
+                                           spec_errs)
+
+    assert new_wavs.shape == (100,)
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-10)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-10)
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        spectres.spectres_adaptive(spec_wavs, spec_fluxes, spec_errs, 0.)
+
+    with pytest.raises(ValueError):
+        spectres.spectres_adaptive(spec_wavs, spec_fluxes, spec_errs[0], 5.)
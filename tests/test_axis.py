@@ -0,0 +1,48 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import backends, spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+rng = np.random.RandomState(5)
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("n_spectra", [5, 20000])
+def test_axis(backend, n_spectra):
+    fluxes = rng.normal(1., 0.2, (spec_wavs.shape[0], n_spectra))
+    errs = np.full(fluxes.shape, 0.1)
+    out = np.empty((new_wavs.shape[0], n_spectra))
+    out_errs = np.empty_like(out)
+
+    new_fluxes, new_errs = spectres.spectres(
+        new_wavs, spec_wavs, fluxes, errs, backend=backend, axis=0,
+        out=out, out_errs=out_errs)
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, fluxes.T,
+                                           errs.T)
+
+    assert new_fluxes is out and new_errs is out_errs
+    np.testing.assert_allclose(new_fluxes, loop_fluxes.T, rtol=1e-12)
+    np.testing.assert_allclose(new_errs, loop_errs.T, rtol=1e-12)
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("axis", [0, 1, -2])
+def test_middle_axis(backend, axis):
+    new_fluxes, new_errs = spectres.spectres(
+        new_wavs, spec_wavs, np.moveaxis(spec_fluxes, -1, axis),
+        np.moveaxis(spec_errs, -1, axis), backend=backend, axis=axis)
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, spec_fluxes,
+                                           spec_errs)
+
+    np.testing.assert_allclose(np.moveaxis(new_fluxes, axis, -1),
+                               loop_fluxes, rtol=1e-12)
+    np.testing.assert_allclose(np.moveaxis(new_errs, axis, -1), loop_errs,
+                               rtol=1e-12)
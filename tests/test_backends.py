@@ -0,0 +1,71 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres import backends as registry
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import backends, spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+def test_available():
+    assert "numpy" in backends
+    assert registry.resolve_backend("auto") == backends[0]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        spectres.spectres(new_wavs, spec_wavs, spec_fluxes,
+                          backend="missing")
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_same_results(backend):
+    new_fluxes, new_errs = spectres.spectres(new_wavs, spec_wavs,
+                                             spec_fluxes, spec_errs,
+                                             backend=backend)
+
+    numpy_fluxes, numpy_errs = spectres.spectres(new_wavs, spec_wavs,
+                                                 spec_fluxes, spec_errs,
+                                                 backend="numpy")
+
+    np.testing.assert_allclose(new_fluxes, numpy_fluxes, rtol=1e-12)
+    np.testing.assert_allclose(new_errs, numpy_errs, rtol=1e-12)
+
+
+def test_register_backend():
+    calls = []
+
+    def engine(*args, **kwargs):
+        calls.append(args[3].shape)
+        return registry.get_backend("numpy")(*args, **kwargs)
+
+    registry.register_backend("test", engine)
+
+    try:
+        new_fluxes = spectres.spectres(new_wavs, spec_wavs, spec_fluxes,
+                                       backend="test")
+
+    finally:
+        del registry._backends["test"]
+
+    assert calls == [spec_fluxes.shape]
+    assert registry.available_backends() == backends
+    np.testing.assert_allclose(new_fluxes, spectres_loop(new_wavs, spec_wavs,
+                                                         spec_fluxes),
+                               rtol=1e-12)
+
+
+def test_spectres_numba():
+    pytest.importorskip("numba")
+
+    wavs = np.linspace(4000., 6100., 100)
+    new_fluxes = spectres.spectres_numba(wavs, spec_wavs, spec_fluxes,
+                                         verbose=False)
+
+    np.testing.assert_allclose(new_fluxes,
+                               spectres_loop(wavs, spec_wavs, spec_fluxes,
+                                             fill=0., verbose=False),
+                               rtol=1e-12)
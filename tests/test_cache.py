@@ -0,0 +1,102 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.cache import GridCache
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import backends, spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+@pytest.fixture
+def cache():
+    spectres.clear_cache()
+    spectres.set_cache(maxsize=4)
+    yield
+    spectres.set_cache(maxsize=0)
+    spectres.clear_cache()
+
+
+def compute(new_wavs, old_wavs):
+    return (new_wavs - 1., (old_wavs + 1., old_wavs*2.))
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_cached_results(cache, backend):
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, spec_fluxes,
+                                           spec_errs)
+
+    for i in range(3):
+        new_fluxes, new_errs = spectres.spectres(new_wavs, spec_wavs,
+                                                 spec_fluxes, spec_errs,
+                                                 backend=backend)
+
+        np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+        np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-12)
+
+    info = spectres.cache_info()
+    assert info["misses"] == 1 and info["hits"] == 2
+    assert info["currsize"] == 1 and info["nbytes"] > 0
+
+
+def test_different_grids(cache):
+    shifted = spectres.spectres(new_wavs + 20., spec_wavs, spec_fluxes)
+    spectres.spectres(new_wavs, spec_wavs, spec_fluxes)
+
+    np.testing.assert_allclose(shifted, spectres_loop(new_wavs + 20.,
+                                                      spec_wavs,
+                                                      spec_fluxes),
+                               rtol=1e-12)
+
+    assert spectres.cache_info()["misses"] == 2
+
+
+def test_clear_cache(cache):
+    spectres.spectres(new_wavs, spec_wavs, spec_fluxes)
+    spectres.clear_cache()
+
+    info = spectres.cache_info()
+    assert info["currsize"] == 0 and info["misses"] == 0
+    assert info["nbytes"] == 0 and info["maxsize"] == 4
+
+
+def test_eviction():
+    grid_cache = GridCache(maxsize=2)
+
+    for shift in [0., 1., 2., 0.]:
+        grid_cache.get(new_wavs + shift, spec_wavs, compute)
+
+    # The first grid was the least recently used when the third was added
+    info = grid_cache.info()
+    assert info["misses"] == 4 and info["evictions"] == 2
+    assert info["currsize"] == 2
+
+
+def test_maxbytes():
+    grid_cache = GridCache(maxsize=10, maxbytes=spec_wavs.nbytes*3)
+
+    for shift in [0., 1., 2.]:
+        grid_cache.get(new_wavs + shift, spec_wavs, compute)
+
+    info = grid_cache.info()
+    assert info["currsize"] == 1 and info["evictions"] == 2
+    assert info["nbytes"] <= info["maxbytes"]
+
+
+def test_read_only():
+    grid_cache = GridCache(maxsize=1)
+    value = grid_cache.get(new_wavs, spec_wavs, compute)
+
+    assert grid_cache.get(new_wavs, spec_wavs, compute) is value
+    assert not value[0].flags.writeable
+    assert not value[1][1].flags.writeable
+
+
+def test_disabled():
+    grid_cache = GridCache()
+    value = grid_cache.get(new_wavs, spec_wavs, compute)
+
+    assert grid_cache.get(new_wavs, spec_wavs, compute) is not value
+    assert value[0].flags.writeable
@@ -0,0 +1,58 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import (backends, spec_wavs, new_wavs, wide_wavs, spec_fluxes,
+                      spec_errs)
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("chunk_rows", [1, 2, 5])
+def test_matches_loop(backend, chunk_rows):
+    new_fluxes, new_errs = spectres.spectres_chunked(
+        wide_wavs, spec_wavs, spec_fluxes, spec_errs, chunk_rows=chunk_rows,
+        fill=-1., verbose=False, backend=backend)
+
+    loop_fluxes, loop_errs = spectres_loop(wide_wavs, spec_wavs, spec_fluxes,
+                                           spec_errs, fill=-1., verbose=False)
+
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-12)
+
+
+def test_single_spectrum():
+    new_fluxes, new_errs = spectres.spectres_chunked(
+        new_wavs, spec_wavs, spec_fluxes[0, 0], spec_errs[0, 0])
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs,
+                                           spec_fluxes[0, 0], spec_errs[0, 0])
+
+    assert new_fluxes.shape == new_wavs.shape
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-12)
+
+
+def test_memory_maps(tmp_path):
+    fluxes = spec_fluxes.reshape(-1, spec_wavs.shape[0])
+    np.save(str(tmp_path / "fluxes.npy"), fluxes)
+
+    out = str(tmp_path / "new_fluxes.npy")
+    new_fluxes = spectres.spectres_chunked(
+        new_wavs, spec_wavs, str(tmp_path / "fluxes.npy"), out=out,
+        chunk_rows=5, preserve_dtype=True)
+
+    del new_fluxes
+
+    np.testing.assert_allclose(np.load(out), spectres_loop(new_wavs,
+                                                           spec_wavs, fluxes),
+                               rtol=1e-12)
+
+
+def test_output_shape():
+    with pytest.raises(ValueError):
+        spectres.spectres_chunked(new_wavs, spec_wavs, spec_fluxes,
+                                  out=np.zeros((3, new_wavs.shape[0])))
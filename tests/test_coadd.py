@@ -0,0 +1,96 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import backends, new_wavs, wide_wavs
+
+
+rng = np.random.RandomState(4)
+
+
+def make_exposures(n_exposures, shape=(2,)):
+    """ Exposures with their own, shifted wavelength samplings. """
+    exposures = []
+
+    for i in range(n_exposures):
+        wavs = np.sort(rng.uniform(4000. + 50.*i, 5800. + 50.*i, 250))
+        fluxes = rng.normal(1., 0.2, shape + wavs.shape)
+        errs = rng.uniform(0.05, 0.2, shape + wavs.shape)
+        exposures.append((wavs, fluxes, errs))
+
+    return exposures
+
+
+def coadded(new_wavs, exposures):
+    """ Inverse-variance weighted mean of the exposures resampled with
+    spectres_loop, ignoring bins outside each exposure. """
+    sum_fluxes = sum_weights = coverage = 0.
+
+    for wavs, fluxes, errs in exposures:
+        new_fluxes, new_errs = spectres_loop(new_wavs, wavs, fluxes, errs,
+                                             fill=np.nan, verbose=False)
+        good = np.isfinite(new_fluxes)
+        weights = np.where(good, 1./new_errs**2, 0.)
+
+        sum_fluxes = sum_fluxes + np.where(good, weights*new_fluxes, 0.)
+        sum_weights = sum_weights + weights
+        coverage = coverage + good
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return sum_fluxes/sum_weights, 1./np.sqrt(sum_weights), coverage
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_matches_loop(backend):
+    exposures = make_exposures(4)
+
+    new_fluxes, new_errs, coverage = spectres.spectres_coadd(
+        new_wavs, iter(exposures), backend=backend)
+
+    loop_fluxes, loop_errs, loop_coverage = coadded(new_wavs, exposures)
+
+    np.testing.assert_array_equal(coverage, loop_coverage)
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-10)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-10)
+
+
+def test_uncovered():
+    exposures = make_exposures(2, shape=())
+
+    with pytest.warns(RuntimeWarning):
+        new_fluxes, new_errs, coverage = spectres.spectres_coadd(
+            wide_wavs, exposures, fill=-1.)
+
+    uncovered = coverage == 0
+    assert np.any(uncovered) and np.all(coverage <= 2)
+    assert np.all(new_fluxes[uncovered] == -1.)
+    assert np.all(new_errs[uncovered] == -1.)
+
+    loop_fluxes, loop_errs = coadded(wide_wavs, exposures)[:2]
+
+    np.testing.assert_allclose(new_fluxes[~uncovered],
+                               loop_fluxes[~uncovered], rtol=1e-10)
+
+
+def test_single_exposure():
+    exposures = make_exposures(1)
+    wavs, fluxes, errs = exposures[0]
+
+    new_fluxes, new_errs, coverage = spectres.spectres_coadd(
+        new_wavs[10:-10], exposures)
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs[10:-10], wavs, fluxes,
+                                           errs)
+
+    assert np.all(coverage == 1)
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-10)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-10)
+
+
+def test_no_exposures():
+    with pytest.raises(ValueError):
+        spectres.spectres_coadd(new_wavs, [])
@@ -0,0 +1,33 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import spec_wavs, new_wavs, spec_fluxes
+
+
+def test_warmup():
+    times = spectres.warmup(dtypes=("float32",), with_errs=(True,),
+                            backends=["numpy"])
+
+    assert list(times) == ["numpy"] and times["numpy"] >= 0.
+
+    # Warming up does not change the results
+    np.testing.assert_allclose(spectres.spectres(new_wavs, spec_wavs,
+                                                 spec_fluxes),
+                               spectres_loop(new_wavs, spec_wavs,
+                                             spec_fluxes), rtol=1e-12)
+
+
+def test_warmup_no_dtypes():
+    times = spectres.warmup(dtypes=(), backends=["numpy"])
+
+    assert list(times) == ["numpy"]
+
+
+def test_lazy_import():
+    from spectres.compile import warmup
+
+    assert spectres.warmup is warmup
@@ -0,0 +1,51 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+
+from .helpers import (backends, spec_wavs, new_wavs, spec_fluxes, spec_errs,
+                      weight_matrix, banded)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_covariance(backend):
+    weights = weight_matrix(new_wavs, spec_wavs)
+    errs = spec_errs[0, 0]
+
+    new_errs, new_covar = spectres.spectres(
+        new_wavs, spec_wavs, spec_fluxes[0, 0], errs, backend=backend,
+        return_covariance=True)[1:]
+
+    dense = np.dot(weights*errs**2, weights.T)
+    n_bands = new_covar.shape[-2]
+
+    np.testing.assert_allclose(new_covar, banded(dense, n_bands),
+                               rtol=1e-10, atol=1e-14)
+    np.testing.assert_allclose(new_errs, np.sqrt(np.diag(dense)),
+                               rtol=1e-10)
+    assert np.allclose(np.diagonal(dense, -n_bands), 0.)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_correlated_covariance(backend):
+    weights = weight_matrix(new_wavs, spec_wavs)
+    errs = spec_errs[0, 0]
+
+    # Neighbouring old pixels are correlated
+    spec_covar = np.diag(errs**2)
+    spec_covar += np.diag(0.4*errs[1:]*errs[:-1], 1)
+    spec_covar += np.diag(0.4*errs[1:]*errs[:-1], -1)
+
+    new_errs, new_covar = spectres.spectres(
+        new_wavs, spec_wavs, spec_fluxes[0, 0], backend=backend,
+        spec_covar=banded(spec_covar, 2), return_covariance=True)[1:]
+
+    dense = np.dot(np.dot(weights, spec_covar), weights.T)
+
+    np.testing.assert_allclose(new_covar,
+                               banded(dense, new_covar.shape[-2]),
+                               rtol=1e-10, atol=1e-14)
+    np.testing.assert_allclose(new_errs, np.sqrt(np.diag(dense)),
+                               rtol=1e-10)
@@ -0,0 +1,49 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import backends, spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("dtype", [np.float32, np.float16])
+def test_preserve_dtype(backend, dtype):
+    new_fluxes, new_errs = spectres.spectres(
+        new_wavs, spec_wavs, spec_fluxes.astype(dtype),
+        spec_errs.astype(dtype), backend=backend, preserve_dtype=True)
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, spec_fluxes,
+                                           spec_errs)
+
+    rtol = 10*np.finfo(dtype).eps
+    assert new_fluxes.dtype == dtype and new_errs.dtype == dtype
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=rtol)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=rtol)
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("axis", [-1, 0])
+def test_small_float32_errs(backend, axis):
+    # Errors of order 1e-21, typical of fluxes in cgs units, underflow
+    # if they are multiplied by the widths and squared in float32. With axis=0 and this many spectra
+    # the wavelength-major rows are resampled directly.
+    fluxes = np.tile(1e-17*spec_fluxes[0, 0], (600, 1))
+    errs = np.tile(1e-20*spec_errs[0, 0], (600, 1))
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, fluxes,
+                                           errs)
+
+    new_fluxes, new_errs = spectres.spectres(
+        new_wavs, spec_wavs, np.moveaxis(fluxes, -1, axis).astype(np.float32),
+        np.moveaxis(errs, -1, axis).astype(np.float32), backend=backend,
+        preserve_dtype=True, axis=axis)
+
+    assert new_errs.dtype == np.float32
+    np.testing.assert_allclose(np.moveaxis(new_fluxes, axis, -1),
+                               loop_fluxes, rtol=1e-6)
+    np.testing.assert_allclose(np.moveaxis(new_errs, axis, -1), loop_errs,
+                               rtol=1e-6)
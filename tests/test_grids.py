@@ -0,0 +1,88 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop, grid_type
+
+from .helpers import backends, spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+old_grids = spec_wavs*np.array([[1.], [1.01], [0.99]])
+new_grids = new_wavs*np.array([[1.], [0.98], [1.02]])
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_2d_grids(backend):
+    fluxes = spec_fluxes[:, 0]
+
+    new_fluxes, new_errs = spectres.spectres(new_grids, old_grids, fluxes,
+                                             spec_errs[:, 0],
+                                             backend=backend, verbose=False)
+
+    for i in range(fluxes.shape[0]):
+        loop_fluxes, loop_errs = spectres_loop(
+            new_grids[i], old_grids[i], fluxes[i], spec_errs[i, 0],
+            verbose=False)
+
+        np.testing.assert_allclose(new_fluxes[i], loop_fluxes, rtol=1e-12)
+        np.testing.assert_allclose(new_errs[i], loop_errs, rtol=1e-12)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_2d_new_grids(backend):
+    new_fluxes = spectres.spectres(new_grids, spec_wavs, spec_fluxes,
+                                   backend=backend, verbose=False)
+
+    for i in range(spec_fluxes.shape[0]):
+        loop_fluxes = spectres_loop(new_grids[i], spec_wavs, spec_fluxes[i],
+                                    verbose=False)
+
+        np.testing.assert_allclose(new_fluxes[i], loop_fluxes, rtol=1e-12)
+
+
+def test_2d_grid_length():
+    with pytest.raises(ValueError):
+        spectres.spectres(new_wavs, old_grids[:2], spec_fluxes[:, 0])
+
+    with pytest.raises(ValueError):
+        spectres.spectres(new_wavs, old_grids[:, 1:], spec_fluxes[:, 0])
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("grid", [None, "linear", "auto"])
+def test_linear_grid(backend, grid):
+    wavs = np.linspace(4000., 6000., 300)
+    new_fluxes = spectres.spectres(new_wavs, wavs, spec_fluxes,
+                                   backend=backend, grid=grid)
+
+    loop_fluxes = spectres_loop(new_wavs, wavs, spec_fluxes)
+
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("grid", ["log", "auto"])
+def test_log_grid(backend, grid):
+    wavs = np.geomspace(4000., 6000., 300)
+
+    # The inner edges of wavs[100:200] are the same as those of wavs
+    for new in (new_wavs, wavs[100:200]):
+        new_fluxes = spectres.spectres(new, wavs, spec_fluxes,
+                                       backend=backend, grid=grid)
+
+        loop_fluxes = spectres_loop(new, wavs, spec_fluxes)
+
+        np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+
+
+def test_grid_type():
+    assert grid_type(np.linspace(4000., 6000., 300)) == "linear"
+    assert grid_type(np.geomspace(4000., 6000., 300)) == "log"
+    assert grid_type(spec_wavs) is None
+
+
+def test_unknown_grid():
+    with pytest.raises(ValueError):
+        spectres.spectres(new_wavs, spec_wavs, spec_fluxes, grid="cubic")
@@ -0,0 +1,69 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres import backends as registry
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import backends, spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+da = pytest.importorskip("dask.array")
+
+
+def test_lazy():
+    fluxes = da.from_array(spec_fluxes, chunks=(1, 2, 100))
+    new_fluxes = spectres.spectres(new_wavs, spec_wavs, fluxes)
+
+    np.testing.assert_allclose(new_fluxes.compute(),
+                               spectres_loop(new_wavs, spec_wavs,
+                                             spec_fluxes), rtol=1e-12)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_lazy_errs(backend):
+    new_fluxes, new_errs = spectres.spectres(
+        new_wavs, spec_wavs, da.from_array(spec_fluxes, chunks=(1, 4, 300)),
+        da.from_array(spec_errs, chunks=(3, 1, 150)), backend=backend)
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, spec_fluxes,
+                                           spec_errs)
+
+    np.testing.assert_allclose(new_fluxes.compute(), loop_fluxes,
+                               rtol=1e-12)
+    np.testing.assert_allclose(new_errs.compute(), loop_errs, rtol=1e-12)
+
+
+def test_lazy_lsf():
+    fluxes = da.from_array(spec_fluxes, chunks=(1, 2, 100))
+    new_fluxes = spectres.spectres(new_wavs, spec_wavs, fluxes,
+                                   lsf_sigma=10.)
+
+    np.testing.assert_allclose(new_fluxes.compute(),
+                               spectres.spectres(new_wavs, spec_wavs,
+                                                 spec_fluxes, lsf_sigma=10.),
+                               rtol=1e-12)
+
+
+def test_serial_kernels():
+    calls = []
+
+    def engine(*args, **kwargs):
+        calls.append(kwargs.pop("_serial", False))
+        return registry.get_backend("numpy")(*args, **kwargs)
+
+    registry.register_backend("test", engine, nogil=True)
+
+    try:
+        fluxes = da.from_array(spec_fluxes, chunks=(1, 4, 300))
+        spectres.spectres(new_wavs, spec_wavs, fluxes,
+                          backend="test").compute(scheduler="threads")
+
+    finally:
+        del registry._backends["test"]
+        registry._nogil_backends.discard("test")
+
+    # Blocks run in parallel with each other, so request serial kernels
+    assert calls == [True]*3
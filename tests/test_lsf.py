@@ -0,0 +1,86 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.lsf import fwhm_sigma
+from spectres.spectral_resampling import make_bins
+
+from .helpers import spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+def convolved(new_wavs, fluxes, sigma, step=0.01):
+    """ Convolve a spectrum, constant across each old bin, with a
+    Gaussian on a fine grid and average it over each new bin. """
+    old_edges = make_bins(spec_wavs)[0]
+    new_edges = make_bins(new_wavs)[0]
+
+    # Exact mean of the spectrum over each fine bin
+    old_cumulative = np.zeros(old_edges.shape[0])
+    np.cumsum(fluxes*np.diff(old_edges), out=old_cumulative[1:])
+
+    fine_edges = np.arange(old_edges[0], old_edges[-1] + step/2., step)
+    fine_fluxes = np.diff(np.interp(fine_edges, old_edges,
+                                    old_cumulative))/step
+
+    offsets = np.arange(-8.*sigma, 8.*sigma + step/2., step)
+    kernel = np.exp(-0.5*(offsets/sigma)**2)
+    smoothed = np.convolve(fine_fluxes, kernel/kernel.sum(), mode="same")
+
+    cumulative = np.zeros(fine_edges.shape[0])
+    np.cumsum(smoothed*step, out=cumulative[1:])
+
+    return (np.diff(np.interp(new_edges, fine_edges, cumulative))
+            / np.diff(new_edges))
+
+
+def test_matches_convolution():
+    new_fluxes = spectres.spectres(new_wavs, spec_wavs, spec_fluxes[0, 0],
+                                   lsf_sigma=10.)
+
+    np.testing.assert_allclose(new_fluxes,
+                               convolved(new_wavs, spec_fluxes[0, 0], 10.),
+                               rtol=1e-6)
+
+
+def test_narrow_lsf():
+    # A line-spread function much narrower than the bins has no effect
+    new_fluxes, new_errs = spectres.spectres(
+        new_wavs, spec_wavs, spec_fluxes, spec_errs, lsf_sigma=1e-6)
+
+    plain_fluxes, plain_errs = spectres.spectres(new_wavs, spec_wavs,
+                                                 spec_fluxes, spec_errs)
+
+    np.testing.assert_allclose(new_fluxes, plain_fluxes, rtol=1e-10)
+    np.testing.assert_allclose(new_errs, plain_errs, rtol=1e-10)
+
+
+def test_resolution():
+    plan = spectres.ResamplingPlan(new_wavs, spec_wavs, resolution=500.)
+    sigma_plan = spectres.ResamplingPlan(
+        new_wavs, spec_wavs, lsf_sigma=new_wavs/(500.*fwhm_sigma))
+
+    np.testing.assert_allclose(plan(spec_fluxes, spec_errs),
+                               sigma_plan(spec_fluxes, spec_errs),
+                               rtol=1e-12)
+
+    np.testing.assert_allclose(plan(spec_fluxes),
+                               spectres.spectres(new_wavs, spec_wavs,
+                                                 spec_fluxes,
+                                                 resolution=500.),
+                               rtol=1e-12)
+
+
+def test_conserves_flux():
+    # The weights for each new bin sum to one, so a flat spectrum stays
+    # flat and the mean of the convolved spectrum is preserved
+    plan = spectres.ResamplingPlan(new_wavs, spec_wavs, lsf_sigma=20.)
+
+    np.testing.assert_allclose(plan(np.ones(spec_wavs.shape[0])), 1.,
+                               rtol=1e-12)
+
+
+def test_positive_width():
+    with pytest.raises(ValueError):
+        spectres.spectres(new_wavs, spec_wavs, spec_fluxes, lsf_sigma=0.)
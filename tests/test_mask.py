@@ -0,0 +1,52 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import backends, spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+rng = np.random.RandomState(3)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_mask(backend):
+    mask = rng.uniform(size=spec_fluxes.shape) < 0.3
+    mask[0, 0, 50:80] = True
+
+    new_fluxes, new_errs, coverage = spectres.spectres(
+        new_wavs, spec_wavs, spec_fluxes, spec_errs, mask=mask,
+        backend=backend, return_coverage=True)
+
+    # Each new bin is the weighted mean of the good pixels it overlaps
+    good = (~mask).astype(float)
+    loop_coverage = spectres_loop(new_wavs, spec_wavs, good)
+    loop_fluxes = spectres_loop(new_wavs, spec_wavs, spec_fluxes*good)
+    loop_errs = spectres_loop(new_wavs, spec_wavs, spec_fluxes,
+                              spec_errs*good)[1]
+
+    covered = loop_coverage > 0.
+    loop_fluxes = loop_fluxes[covered]/loop_coverage[covered]
+    loop_errs = loop_errs[covered]/loop_coverage[covered]
+
+    np.testing.assert_allclose(coverage, loop_coverage, atol=1e-12)
+    np.testing.assert_allclose(new_fluxes[covered], loop_fluxes, rtol=1e-10)
+    np.testing.assert_allclose(new_errs[covered], loop_errs, rtol=1e-10)
+    assert np.all(np.isnan(new_fluxes[~covered]))
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_ignore_nan(backend):
+    fluxes = spec_fluxes.copy()
+    fluxes[rng.uniform(size=fluxes.shape) < 0.1] = np.nan
+
+    new_fluxes = spectres.spectres(new_wavs, spec_wavs, fluxes,
+                                   ignore_nan=True, backend=backend)
+    masked_fluxes = spectres.spectres(new_wavs, spec_wavs, fluxes,
+                                      mask=np.isnan(fluxes),
+                                      backend=backend)
+
+    np.testing.assert_allclose(new_fluxes, masked_fluxes, rtol=1e-12)
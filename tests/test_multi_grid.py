@@ -0,0 +1,58 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import (backends, spec_wavs, new_wavs, wide_wavs, spec_fluxes,
+                      spec_errs)
+
+
+# Grids of different lengths, one extending beyond spec_wavs
+grids = [new_wavs, wide_wavs, np.linspace(4500., 5000., 17)]
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_matches_loop(backend):
+    results = spectres.spectres_multi(grids, spec_wavs, spec_fluxes,
+                                      spec_errs, fill=-1., verbose=False,
+                                      backend=backend)
+
+    for wavs, (new_fluxes, new_errs) in zip(grids, results):
+        loop_fluxes, loop_errs = spectres_loop(wavs, spec_wavs, spec_fluxes,
+                                               spec_errs, fill=-1.,
+                                               verbose=False)
+
+        np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-10)
+        np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-10)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_non_finite(backend):
+    fluxes = spec_fluxes[0].copy()
+    errs = spec_errs[0].copy()
+    fluxes[0, 100] = np.nan
+    fluxes[1, 150] = np.inf
+    errs[2, 200] = np.inf
+
+    results = spectres.spectres_multi(grids, spec_wavs, fluxes, errs,
+                                      verbose=False, backend=backend)
+
+    for wavs, (new_fluxes, new_errs) in zip(grids, results):
+        loop_fluxes, loop_errs = spectres_loop(wavs, spec_wavs, fluxes,
+                                               errs, verbose=False)
+
+        np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-10)
+        np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-10)
+
+
+def test_without_errs():
+    with pytest.warns(RuntimeWarning):
+        results = spectres.spectres_multi(grids, spec_wavs, spec_fluxes)
+
+    for wavs, new_fluxes in zip(grids, results):
+        np.testing.assert_allclose(new_fluxes,
+                                   spectres_loop(wavs, spec_wavs, spec_fluxes,
+                                                 verbose=False), rtol=1e-10)
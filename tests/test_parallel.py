@@ -0,0 +1,93 @@
+from __future__ import print_function, division, absolute_import
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import backends, spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+# Resamples a spectrum with the Numba engine, passing _serial or
+# calling from another thread as requested on the command line, and
+# prints whether a parallel kernel was run
+kernel_script = """
+import sys
+import threading
+import numba
+import numpy as np
+import spectres
+from spectres.backends import get_backend
+from spectres.spectral_resampling import make_bins
+
+old_edges, old_widths = make_bins(np.linspace(1., 9., 32))
+new_edges = make_bins(np.linspace(1.5, 8.5, 8))[0]
+
+def resample():
+    get_backend("numba")(old_edges, old_widths, new_edges, np.ones(32),
+                         _serial=sys.argv[1] == "serial")
+
+if sys.argv[1] == "thread":
+    thread = threading.Thread(target=resample)
+    thread.start()
+    thread.join()
+
+else:
+    resample()
+
+try:
+    numba.threading_layer()
+    print("parallel")
+
+except ValueError:
+    print("serial")
+"""
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_parallel_resampler(backend):
+    with spectres.ParallelResampler(new_wavs, spec_wavs, n_jobs=2,
+                                    backend=backend,
+                                    use_threads=True) as resampler:
+
+        new_fluxes, new_errs = resampler(spec_fluxes, spec_errs)
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, spec_fluxes,
+                                           spec_errs)
+
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-12)
+
+
+def run_kernels(modes, cache_dir):
+    env = dict(os.environ, NUMBA_CACHE_DIR=str(cache_dir))
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(spectres.__file__))]
+        + env.get("PYTHONPATH", "").split(os.pathsep))
+
+    return [subprocess.check_output([sys.executable, "-c", kernel_script,
+                                     mode], env=env,
+                                    timeout=300).decode().strip()
+            for mode in modes]
+
+
+def test_kernel_caches(tmp_path):
+    pytest.importorskip("numba")
+
+    # Each kernel is compiled, then loaded from the cache by later
+    # processes, in both orders
+    kernels = ["parallel", "serial", "serial", "parallel"]
+
+    assert run_kernels(kernels, tmp_path) == kernels
+
+
+def test_kernel_outside_main_thread(tmp_path):
+    pytest.importorskip("numba")
+
+    # The process must also exit cleanly, which the timeout checks
+    assert run_kernels(["thread"], tmp_path) == ["serial"]
@@ -0,0 +1,80 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import make_bins, spectres_loop
+
+from .helpers import spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+def test_top_hats():
+    # Without photon counting a flat filter covering one new bin gives
+    # the same band flux as resampling onto that bin
+    new_edges = make_bins(new_wavs)[0]
+    filters = [(new_edges[i:i+2], np.ones(2))
+               for i in range(new_wavs.shape[0])]
+
+    filter_set = spectres.FilterSet(filters, spec_wavs,
+                                    photon_counting=False)
+    band_fluxes, band_errs = filter_set(spec_fluxes, spec_errs)
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, spec_fluxes,
+                                           spec_errs)
+
+    np.testing.assert_allclose(band_fluxes, loop_fluxes, rtol=1e-10)
+    np.testing.assert_allclose(band_errs, loop_errs, rtol=1e-10)
+
+
+@pytest.mark.parametrize("photon_counting", [False, True])
+def test_integral(photon_counting):
+    filter_wavs = np.linspace(4500., 5500., 41)
+    transmission = np.exp(-0.5*((filter_wavs - 5000.)/150.)**2)
+
+    filter_set = spectres.FilterSet([np.c_[filter_wavs, transmission]],
+                                    spec_wavs,
+                                    photon_counting=photon_counting)
+
+    # Integrate the spectrum, constant across each old bin, through the
+    # linearly interpolated filter on a fine grid
+    old_edges = make_bins(spec_wavs)[0]
+    fine_wavs = np.linspace(4400., 5600., 1200001)
+    fine_fluxes = spec_fluxes[0, 0][np.searchsorted(old_edges, fine_wavs)-1]
+    weights = np.interp(fine_wavs, filter_wavs, transmission, left=0.,
+                        right=0.)
+
+    if photon_counting:
+        weights *= fine_wavs
+
+    expected = np.sum(weights*fine_fluxes)/np.sum(weights)
+
+    np.testing.assert_allclose(filter_set(spec_fluxes[0, 0]), [expected],
+                               rtol=1e-5)
+
+
+def test_fill():
+    filters = [(np.array([4500., 5000.]), np.ones(2)),
+               (np.array([5900., 6500.]), np.ones(2))]
+
+    with pytest.warns(RuntimeWarning):
+        filter_set = spectres.FilterSet(filters, spec_wavs, fill=-1.)
+
+    band_fluxes, band_errs = filter_set(spec_fluxes, spec_errs)
+
+    assert list(filter_set.inside) == [True, False]
+    assert np.all(band_fluxes[..., 1] == -1.)
+    assert np.all(band_errs[..., 1] == -1.)
+    assert 4500. < filter_set.mean_wavs[0] < 5000.
+    assert np.isnan(filter_set.mean_wavs[1])
+
+
+def test_wrong_length():
+    filter_set = spectres.FilterSet([(np.array([4500., 5000.]),
+                                      np.ones(2))], spec_wavs)
+
+    with pytest.raises(ValueError):
+        filter_set(spec_fluxes[..., 1:])
+
+    with pytest.raises(ValueError):
+        filter_set(spec_fluxes, spec_errs[0])
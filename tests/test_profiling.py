@@ -0,0 +1,74 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import (backends, spec_wavs, new_wavs, wide_wavs, spec_fluxes,
+                      spec_errs)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_profile(backend):
+    with spectres.profile() as prof:
+        new_fluxes, new_errs = spectres.spectres(new_wavs, spec_wavs,
+                                                 spec_fluxes, spec_errs,
+                                                 backend=backend)
+        spectres.spectres(wide_wavs, spec_wavs, spec_fluxes, backend=backend,
+                          verbose=False)
+
+    # Profiling does not change the results
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, spec_fluxes,
+                                           spec_errs)
+
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-12)
+
+    first, second = prof.calls
+    assert first["backend"] == second["backend"] == backend
+    assert (first["n_spectra"], first["n_old"], first["n_new"]) == (12, 300,
+                                                                    90)
+
+    # Bins at the ends of wide_wavs lie outside spec_wavs in every
+    # spectrum
+    loop_fluxes = spectres_loop(wide_wavs, spec_wavs, spec_fluxes,
+                                verbose=False)
+
+    assert first["n_filled"] == 0
+    assert second["n_filled"] == np.sum(np.isnan(loop_fluxes))
+
+    for call in prof.calls:
+        assert set(call["times"]) == set(spectres.profiling.phases
+                                         + ("total",))
+        assert all(time >= 0. for time in call["times"].values())
+        assert call["bytes"] > 0 and call["pixels_per_bin"] > 1.
+
+    summary = prof.summary()
+    assert summary["n_calls"] == 2 and summary["backends"] == {backend: 2}
+    assert "2 calls" in str(prof)
+
+
+def test_stats_callback():
+    records = []
+    spectres.spectres(new_wavs, spec_wavs, spec_fluxes, stats=records.append)
+
+    assert len(records) == 1 and records[0]["n_new"] == 90
+
+
+def test_inactive():
+    with spectres.profile() as prof:
+        pass
+
+    spectres.spectres(new_wavs, spec_wavs, spec_fluxes)
+
+    assert prof.calls == []
+    assert prof.summary()["n_calls"] == 0
+
+
+def test_trace_memory():
+    with spectres.profile(trace_memory=True) as prof:
+        spectres.spectres(new_wavs, spec_wavs, spec_fluxes, spec_errs)
+
+    assert prof.calls[0]["peak_bytes"] > 0
@@ -0,0 +1,68 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import backends, spec_wavs, spec_fluxes, spec_errs
+
+
+rest_wavs = spec_wavs/2.
+obs_wavs = np.linspace(2100., 5900., 150)
+z_array = np.linspace(0., 1.2, 7)
+
+
+def loop(fluxes, errs=None):
+    """ spectres_loop called at every redshift in z_array. """
+    results = [spectres_loop(obs_wavs, rest_wavs*(1. + z), fluxes, errs,
+                             fill=-1., verbose=False) for z in z_array]
+
+    if errs is None:
+        return np.array(results)
+
+    return (np.array([result[0] for result in results]),
+            np.array([result[1] for result in results]))
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_matches_loop(backend):
+    new_fluxes, new_errs = spectres.spectres_redshift_grid(
+        obs_wavs, rest_wavs, spec_fluxes, z_array, spec_errs, fill=-1.,
+        verbose=False, backend=backend)
+
+    loop_fluxes, loop_errs = loop(spec_fluxes, spec_errs)
+
+    assert new_fluxes.shape == z_array.shape + loop_fluxes.shape[1:]
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-10)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-10)
+
+
+def test_non_finite():
+    fluxes = spec_fluxes[0, 0].copy()
+    errs = spec_errs[0, 0].copy()
+    fluxes[40] = np.nan
+    fluxes[150] = np.inf
+    errs[250] = np.inf
+
+    new_fluxes, new_errs = spectres.spectres_redshift_grid(
+        obs_wavs, rest_wavs, fluxes, z_array, errs, fill=-1., verbose=False)
+
+    loop_fluxes, loop_errs = loop(fluxes, errs)
+
+    # Only the new bins overlapping each bad pixel are affected
+    assert np.array_equal(np.isnan(new_fluxes), np.isnan(loop_fluxes))
+    assert np.array_equal(np.isinf(new_fluxes), np.isinf(loop_fluxes))
+    assert np.array_equal(np.isinf(new_errs), np.isinf(loop_errs))
+    assert np.sum(np.isnan(new_fluxes)) < z_array.shape[0]*3
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-10)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-10)
+
+
+def test_without_errs():
+    new_fluxes = spectres.spectres_redshift_grid(
+        obs_wavs, rest_wavs, spec_fluxes, z_array, fill=-1., verbose=False)
+
+    np.testing.assert_allclose(new_fluxes, loop(spec_fluxes),
+                               rtol=1e-10)
@@ -0,0 +1,101 @@
+from __future__ import print_function, division, absolute_import
+
+import sys
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import (spec_wavs, new_wavs, wide_wavs, spec_fluxes,
+                      spec_errs, weight_matrix)
+
+
+rng = np.random.RandomState(2)
+
+
+def dense(plan):
+    """ The weight matrix of a plan as a dense array. """
+    matrix = np.zeros(plan.shape)
+
+    for i in range(plan.shape[0]):
+        row = slice(plan.indptr[i], plan.indptr[i+1])
+        matrix[i, plan.indices[row]] = plan.weights[row]
+
+    return matrix
+
+
+@pytest.mark.parametrize("wavs", [new_wavs, wide_wavs])
+def test_matches_loop(wavs):
+    plan = spectres.ResamplingPlan(wavs, spec_wavs, fill=-1., verbose=False)
+    new_fluxes, new_errs = plan(spec_fluxes, spec_errs)
+
+    loop_fluxes, loop_errs = spectres_loop(wavs, spec_wavs, spec_fluxes,
+                                           spec_errs, fill=-1., verbose=False)
+
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-12)
+
+
+def test_weights():
+    plan = spectres.ResamplingPlan(wide_wavs, spec_wavs, verbose=False)
+    weights = dense(plan)
+
+    np.testing.assert_allclose(weights, weight_matrix(wide_wavs, spec_wavs),
+                               rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(weights.sum(axis=1)[plan.inside], 1.,
+                               rtol=1e-12)
+    assert not np.any(weights[~plan.inside])
+
+
+def test_reused():
+    plan = spectres.ResamplingPlan(new_wavs, spec_wavs)
+
+    for fluxes in spec_fluxes:
+        np.testing.assert_allclose(plan(fluxes),
+                                   spectres.spectres(new_wavs, spec_wavs,
+                                                     fluxes), rtol=1e-12)
+
+
+def test_wrong_length():
+    plan = spectres.ResamplingPlan(new_wavs, spec_wavs)
+
+    with pytest.raises(ValueError):
+        plan(spec_fluxes[..., 1:])
+
+    with pytest.raises(ValueError):
+        plan(spec_fluxes, spec_errs[0])
+
+
+def test_adjoint():
+    weights = weight_matrix(new_wavs, spec_wavs)
+    new_values = rng.normal(size=(4, new_wavs.shape[0]))
+
+    plan = spectres.ResamplingPlan(new_wavs, spec_wavs)
+
+    np.testing.assert_allclose(spectres.spectres_adjoint(new_wavs, spec_wavs,
+                                                         new_values),
+                               np.dot(new_values, weights), rtol=1e-12)
+
+    np.testing.assert_allclose(plan.T(new_values), np.dot(new_values,
+                                                           weights),
+                               rtol=1e-12)
+
+
+def test_jacobian():
+    pytest.importorskip("scipy")
+
+    plan = spectres.ResamplingPlan(wide_wavs, spec_wavs, verbose=False)
+
+    np.testing.assert_array_equal(plan.jacobian().toarray(), dense(plan))
+
+
+def test_jacobian_without_scipy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "scipy.sparse", None)
+
+    plan = spectres.ResamplingPlan(wide_wavs, spec_wavs, verbose=False)
+    jacobian = plan.jacobian()
+
+    assert isinstance(jacobian, np.ndarray)
+    np.testing.assert_array_equal(jacobian, dense(plan))
@@ -0,0 +1,69 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import (backends, spec_wavs, new_wavs, wide_wavs,
+                      spec_fluxes, spec_errs)
+
+
+rng = np.random.RandomState(1)
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("wavs", [new_wavs, wide_wavs])
+def test_matches_loop(backend, wavs):
+    new_fluxes, new_errs = spectres.spectres(wavs, spec_wavs, spec_fluxes,
+                                             spec_errs, backend=backend,
+                                             verbose=False)
+
+    loop_fluxes, loop_errs = spectres_loop(wavs, spec_wavs, spec_fluxes,
+                                           spec_errs, verbose=False)
+
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-12)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_fill_and_warning(backend):
+    with pytest.warns(RuntimeWarning):
+        new_fluxes = spectres.spectres(wide_wavs, spec_wavs, spec_fluxes,
+                                       fill=-1., backend=backend)
+
+    # Bins within 100 of either end of wide_wavs are outside spec_wavs
+    assert np.all(new_fluxes[..., :5] == -1.)
+    assert np.all(new_fluxes[..., -5:] == -1.)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_nan_stays_local(backend):
+    fluxes = spec_fluxes[0, 0].copy()
+    errs = spec_errs[0, 0].copy()
+    fluxes[100] = np.nan
+    errs[200] = np.inf
+
+    new_fluxes, new_errs = spectres.spectres(new_wavs, spec_wavs, fluxes,
+                                             errs, backend=backend)
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, fluxes, errs)
+
+    assert np.sum(np.isnan(new_fluxes)) == np.sum(np.isnan(loop_fluxes))
+    assert np.sum(np.isinf(new_errs)) == np.sum(np.isinf(loop_errs))
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-12)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_dynamic_range(backend):
+    errs = spec_errs[0, 0]*10.**rng.uniform(-8., 8., spec_wavs.shape[0])
+
+    new_errs = spectres.spectres(new_wavs, spec_wavs, spec_fluxes[0, 0],
+                                 errs, backend=backend)[1]
+
+    loop_errs = spectres_loop(new_wavs, spec_wavs, spec_fluxes[0, 0],
+                              errs)[1]
+
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-10)
@@ -0,0 +1,63 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import (backends, spec_wavs, new_wavs, wide_wavs, spec_fluxes,
+                      spec_errs)
+
+
+def joined(pieces, n_outputs):
+    """ Join the arrays yielded by spectres_stream. """
+    return [np.concatenate([piece[i] for piece in pieces], axis=-1)
+            for i in range(n_outputs)]
+
+
+@pytest.mark.parametrize("window_size", [1, 37, 1000])
+def test_stream(window_size):
+    windows = spectres.stream_windows(spec_wavs, spec_fluxes, spec_errs,
+                                      window_size=window_size)
+
+    new_fluxes, new_errs = joined(list(spectres.spectres_stream(new_wavs,
+                                                                windows)), 2)
+
+    loop_fluxes, loop_errs = spectres_loop(new_wavs, spec_wavs, spec_fluxes,
+                                           spec_errs)
+
+    np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+    np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-12)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_fill(backend):
+    windows = ((spec_wavs[i:i+50], spec_fluxes[..., i:i+50])
+               for i in range(0, spec_wavs.shape[0], 50))
+
+    with pytest.warns(RuntimeWarning):
+        pieces = list(spectres.spectres_stream(wide_wavs, windows, fill=-1.,
+                                               backend=backend))
+
+    new_fluxes = np.concatenate(pieces, axis=-1)
+
+    np.testing.assert_allclose(new_fluxes,
+                               spectres_loop(wide_wavs, spec_wavs,
+                                             spec_fluxes, fill=-1.,
+                                             verbose=False), rtol=1e-12)
+
+
+def test_memory_maps(tmp_path):
+    fluxes = np.lib.format.open_memmap(str(tmp_path/"fluxes.npy"), mode="w+",
+                                       shape=spec_fluxes.shape)
+    fluxes[:] = spec_fluxes
+
+    windows = spectres.stream_windows(spec_wavs, fluxes, window_size=64)
+    new_fluxes = np.concatenate(list(spectres.spectres_stream(new_wavs,
+                                                              windows)),
+                                axis=-1)
+
+    np.testing.assert_allclose(new_fluxes, spectres_loop(new_wavs, spec_wavs,
+                                                         spec_fluxes),
+                               rtol=1e-12)
@@ -0,0 +1,58 @@
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+
+import spectres
+from spectres.spectral_resampling import spectres_loop
+
+from .helpers import backends, spec_wavs, new_wavs, spec_fluxes, spec_errs
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_out(backend):
+    out = np.empty((new_wavs.shape[0], 12)).T.reshape(3, 4, -1)
+    new_fluxes = spectres.spectres(new_wavs, spec_wavs, spec_fluxes,
+                                   backend=backend, out=out)
+
+    assert new_fluxes is out
+    np.testing.assert_allclose(out, spectres_loop(new_wavs, spec_wavs,
+                                                  spec_fluxes), rtol=1e-12)
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_workspace(backend):
+    workspace = spectres.Workspace(new_wavs, spec_wavs)
+    out = np.empty(spec_fluxes.shape[:-1] + new_wavs.shape)
+    out_errs = np.empty_like(out)
+
+    # The grids change between calls but their lengths do not
+    for shift in [0., 25., -40.]:
+        new_fluxes, new_errs = spectres.spectres(
+            new_wavs + shift, spec_wavs, spec_fluxes, spec_errs,
+            backend=backend, workspace=workspace, out=out,
+            out_errs=out_errs)
+
+        loop_fluxes, loop_errs = spectres_loop(new_wavs + shift, spec_wavs,
+                                               spec_fluxes, spec_errs)
+
+        assert new_fluxes is out and new_errs is out_errs
+        np.testing.assert_allclose(new_fluxes, loop_fluxes, rtol=1e-12)
+        np.testing.assert_allclose(new_errs, loop_errs, rtol=1e-12)
+
+
+def test_arrays_reused():
+    workspace = spectres.Workspace(new_wavs, spec_wavs)
+    arrays = workspace.update(new_wavs, spec_wavs)
+
+    for new, old in zip(workspace.update(new_wavs + 10., spec_wavs),
+                        arrays):
+        assert new is old
+
+
+def test_wrong_length():
+    workspace = spectres.Workspace(new_wavs, spec_wavs)
+
+    with pytest.raises(ValueError):
+        spectres.spectres(new_wavs[1:], spec_wavs, spec_fluxes,
+                          workspace=workspace)